@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save)
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.services import bulk_written
+
+from .utils.cache_utils import GLOBAL_SCOPE, bump_versions
+from .utils.slug_cache import category_slugs, genre_slugs
+from .utils.user_cache import user_cache
+from .v1.authentication import revoke_claims
+
+User = get_user_model()
+
+
+def bump_on_commit(*scopes):
+    """Меняет версии областей после коммита текущей транзакции."""
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_on_commit('categories')
+    transaction.on_commit(category_slugs.clear)
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    bump_on_commit('genres')
+    transaction.on_commit(genre_slugs.clear)
+
+
+@receiver([post_save, post_delete], sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    bump_on_commit('titles', f'title:{instance.pk}',
+                   f'reviews:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, **kwargs):
+    if isinstance(instance, Title):
+        bump_on_commit('titles', f'title:{instance.pk}')
+    else:
+        bump_on_commit('titles')
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    bump_on_commit('titles', f'title:{instance.title_id}',
+                   f'reviews:{instance.title_id}', f'review:{instance.pk}',
+                   f'comments:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    bump_on_commit(f'comments:{instance.review_id}',
+                   f'comment:{instance.pk}')
+
+
+@receiver(bulk_written)
+def invalidate_bulk_written(sender, **kwargs):
+    """Массовая запись меняет любые объекты: сбрасывает все версии."""
+    bump_versions(GLOBAL_SCOPE)
+    category_slugs.clear()
+    genre_slugs.clear()
+
+
+AUTH_FIELDS = ('role', 'is_superuser', 'is_active')
+
+
+@receiver(post_init, sender=User)
+def remember_auth_fields(sender, instance, **kwargs):
+    """Запоминает поля, которые попадают в claims токена."""
+    instance._auth_fields = tuple(
+        instance.__dict__.get(field) for field in AUTH_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def invalidate_authors(sender, instance, created, **kwargs):
+    if created:
+        return
+    bump_on_commit('users')
+    user_cache.invalidate(instance.pk)
+    # Повторно после коммита: параллельный запрос мог успеть положить в
+    # общий кэш строку, прочитанную до коммита.
+    transaction.on_commit(lambda: user_cache.invalidate(instance.pk))
+    auth_fields = tuple(getattr(instance, field) for field in AUTH_FIELDS)
+    if auth_fields != instance._auth_fields:
+        revoke_claims(instance.pk)
+        instance._auth_fields = auth_fields
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_author(sender, instance, **kwargs):
+    bump_on_commit('users')
+    user_cache.invalidate(instance.pk)
+    revoke_claims(instance.pk)
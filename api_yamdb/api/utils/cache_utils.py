@@ -0,0 +1,76 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+VERSION_KEY = 'api:version:{}'
+# Версия всех данных сразу: входит в каждый ETag и меняется после
+# массовой записи, которая не знает, какие объекты затронула.
+GLOBAL_SCOPE = 'all'
+SHARED_CACHE = 'shared'
+REVOCATION_CACHE = 'revocations'
+
+
+def shared_cache():
+    """Кэш, общий для всех процессов (алиас shared в CACHES)."""
+    return caches[SHARED_CACHE]
+
+
+def revocation_cache():
+    """Общий кэш без вытеснения для отметок об отзыве claims."""
+    return caches[REVOCATION_CACHE]
+
+
+def check_shared_cache():
+    """Проверяет, что кэши shared и revocations общие для процессов.
+
+    В них лежат версии данных и отметки об отзыве claims токенов: в
+    локальном кэше каждого процесса другие воркеры их не увидят, будут
+    отвечать 304 по устаревшим ETag и доверять старой роли до истечения
+    токена.
+    """
+    for alias in (SHARED_CACHE, REVOCATION_CACHE):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend is None or backend in settings.LOCAL_CACHE_BACKENDS:
+            raise ImproperlyConfigured(
+                f'Кэш {alias!r} должен быть общим для всех процессов, '
+                f'а не {backend}. Задайте {alias.upper()}_CACHE_BACKEND.')
+
+
+def get_versions(*scopes):
+    """Возвращает версии данных по областям.
+
+    Версия - время последнего изменения области. Версии хранятся в
+    общем кэше shared_cache(), чтобы запись в одном процессе меняла ETag
+    во всех. Если версии нет в кэше (первый запрос или вытеснение), она
+    создается заново, что лишь сбрасывает закэшированные ответы.
+    """
+    store = shared_cache()
+    keys = {VERSION_KEY.format(scope): scope for scope in scopes}
+    found = store.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = time.time()
+        for key in missing:
+            store.add(key, now, timeout=None)
+        found.update(store.get_many(missing))
+    return {scope: found[key] for key, scope in keys.items()}
+
+
+def bump_versions(*scopes):
+    """Отмечает изменение данных в областях.
+
+    Вызывается после коммита (transaction.on_commit): иначе параллельный
+    запрос успеет связать новую версию со старыми данными.
+    """
+    now = time.time()
+    shared_cache().set_many(
+        {VERSION_KEY.format(scope): now for scope in scopes}, timeout=None)
+
+
+def make_etag(*parts):
+    """Строит сильный ETag из частей ключа."""
+    return '"{}"'.format(
+        md5('|'.join(str(part) for part in parts).encode()).hexdigest())
@@ -0,0 +1,61 @@
+import threading
+
+from reviews.models import Category, Genre
+
+from .cache_utils import GLOBAL_SCOPE, get_versions
+
+
+class SlugCache:
+    """Кэш слаг -> первичный ключ в памяти процесса.
+
+    Содержимое сверяется с версией области данных (те же версии, что и
+    у ETag): запись в другом процессе меняет версию в общем кэше, и
+    словарь сбрасывается при следующем обращении. В своем процессе
+    сигналы сбрасывают его сразу через clear().
+    """
+
+    def __init__(self, model, scope):
+        self.model = model
+        self.scope = scope
+        self.lock = threading.Lock()
+        self.version = None
+        self.pks = {}
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются вместе с аргументами, а кэш
+        # должен остаться общим на процесс.
+        return self
+
+    def clear(self):
+        with self.lock:
+            self.version = None
+            self.pks = {}
+
+    def resolve(self, slugs):
+        """Возвращает словарь слаг -> pk; неизвестных слагов в нем нет.
+
+        Отсутствующие в кэше слаги запрашиваются одним запросом.
+        """
+        versions = get_versions(GLOBAL_SCOPE, self.scope)
+        version = (versions[GLOBAL_SCOPE], versions[self.scope])
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.pks = {}
+            pks = self.pks
+        slugs = set(slugs)
+        found = {slug: pks[slug] for slug in slugs if slug in pks}
+        missing = slugs - found.keys()
+        if missing:
+            loaded = dict(self.model.objects.filter(
+                slug__in=missing).values_list('slug', 'pk'))
+            pks.update(loaded)
+            found.update(loaded)
+        return found
+
+    def get(self, slug):
+        return self.resolve([slug]).get(slug)
+
+
+category_slugs = SlugCache(Category, 'categories')
+genre_slugs = SlugCache(Genre, 'genres')
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+
+from .cache_utils import shared_cache
+
+User = get_user_model()
+
+USER_KEY = 'auth:user:{}'
+
+
+class UserCache:
+    """Кэш пользователей для аутентификации по id.
+
+    Первый уровень - LRU в памяти процесса на size записей с коротким
+    ttl, второй (при shared) - общий для процессов кэш shared_cache() с
+    shared_ttl. Хранятся значения полей, а не объекты: каждый get()
+    собирает новый экземпляр, поэтому изменения во вьюхе не попадают в
+    кэш. Сигналы пользователя
+    вызывают invalidate(), в других процессах локальная запись живет не
+    дольше ttl.
+    """
+
+    def __init__(self, size, ttl, shared=True, shared_ttl=60):
+        self.size = size
+        self.ttl = ttl
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.lock = threading.Lock()
+        self.fields = [field.attname for field in User._meta.concrete_fields]
+        self.clear()
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def clear(self):
+        """Очищает локальный уровень и счетчики."""
+        with self.lock:
+            self.rows = OrderedDict()
+            self.counters = dict.fromkeys(
+                ('local_hits', 'shared_hits', 'misses', 'evictions',
+                 'invalidations'), 0)
+
+    def get(self, pk):
+        """Пользователь по первичному ключу или None, если его нет."""
+        values = self.get_local(pk)
+        if values is None and self.shared:
+            values = shared_cache().get(USER_KEY.format(pk))
+            if values is not None:
+                self.count('shared_hits')
+                self.set_local(pk, values)
+        if values is None:
+            self.count('misses')
+            values = User.objects.filter(pk=pk).values_list(
+                *self.fields).first()
+            if values is None:
+                return None
+            self.set_local(pk, values)
+            if self.shared:
+                shared_cache().set(USER_KEY.format(pk), values,
+                                   timeout=self.shared_ttl)
+        return User.from_db(
+            router.db_for_read(User), self.fields, values)
+
+    def get_local(self, pk):
+        if not self.size:
+            return None
+        with self.lock:
+            row = self.rows.get(pk)
+            if row is None:
+                return None
+            expires, values = row
+            if expires < time.monotonic():
+                del self.rows[pk]
+                return None
+            self.rows.move_to_end(pk)
+            self.counters['local_hits'] += 1
+            return values
+
+    def set_local(self, pk, values):
+        if not self.size:
+            return
+        with self.lock:
+            self.rows[pk] = (time.monotonic() + self.ttl, values)
+            self.rows.move_to_end(pk)
+            while len(self.rows) > self.size:
+                self.rows.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate(self, pk):
+        with self.lock:
+            self.rows.pop(pk, None)
+            self.counters['invalidations'] += 1
+        if self.shared:
+            shared_cache().delete(USER_KEY.format(pk))
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters, size=len(self.rows))
+        hits = stats['local_hits'] + stats['shared_hits']
+        total = hits + stats['misses']
+        stats['hit_rate'] = hits / total if total else None
+        return stats
+
+
+user_cache = UserCache(
+    settings.AUTH_USER_CACHE_SIZE,
+    settings.AUTH_USER_CACHE_TTL,
+    settings.AUTH_USER_CACHE_SHARED,
+    settings.AUTH_USER_CACHE_SHARED_TTL,
+)
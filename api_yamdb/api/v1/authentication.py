@@ -0,0 +1,110 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..utils.cache_utils import revocation_cache
+from ..utils.user_cache import user_cache
+
+User = get_user_model()
+
+CLAIMS = ('role', 'is_superuser')
+REVOKED_KEY = 'auth:revoked:{}'
+
+
+def access_token_for_user(user):
+    """Выдает AccessToken с ролью и признаком суперюзера в claims."""
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def revoke_claims(user_id):
+    """Отзывает claims токенов, выданных пользователю до этого момента.
+
+    Такие токены остаются действительными, но пользователь для них
+    снова читается из БД. Отметка живет в общем кэше без вытеснения
+    revocation_cache(), чтобы ее видели все процессы, и не дольше самих
+    токенов.
+    """
+    lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+    revocation_cache().set(REVOKED_KEY.format(user_id), time.time(),
+                           timeout=int(lifetime.total_seconds()))
+
+
+def load_user(user_id):
+    """Активный пользователь из кэша пользователей или из БД."""
+    user = user_cache.get(user_id)
+    if user is None or not user.is_active:
+        raise AuthenticationFailed(
+            'Пользователь не найден', code='user_not_found')
+    return user
+
+
+def db_user(user):
+    """Пользователь из БД для кода, которому нужна модель целиком."""
+    if isinstance(user, ClaimsUser):
+        return user.instance
+    return user
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из подписанных claims токена.
+
+    Права проверяются без запроса к БД; модель загружается лениво через
+    instance, только если она действительно нужна вьюхе.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @cached_property
+    def is_superuser(self):
+        return self.token['is_superuser']
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_user(self):
+        return self.role == User.USER
+
+    @cached_property
+    def instance(self):
+        return load_user(self.id)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT аутентификация без чтения пользователя из БД.
+
+    Если в токене есть claims из access_token_for_user и они не отозваны
+    revoke_claims, возвращается ClaimsUser. Для старых токенов без claims
+    и отозванных пользователь берется из user_cache.
+    """
+
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in CLAIMS):
+            user = ClaimsUser(validated_token)
+            revoked = revocation_cache().get(REVOKED_KEY.format(user.id))
+            if revoked is None or validated_token['iat'] > revoked:
+                return user
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя')
+        return load_user(user_id)
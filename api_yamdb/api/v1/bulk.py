@@ -0,0 +1,269 @@
+"""Массовая запись каталога: произведения, жанры и категории.
+
+Каждый элемент проверяется сериализатором без запросов к БД, затем
+слаги и ключи всей пачки разрешаются одним запросом на модель, а запись
+идет через bulk_create и bulk_update. Сигналы моделей при этом не
+вызываются, поэтому поисковый индекс, статистика, журнал изменений и
+версии кэша обновляются явно.
+"""
+from django.db import transaction
+from reviews.models import (Category, ChangeLog, Genre, GenreTitle, Title,
+                            TitleStats)
+from reviews.search import index_titles
+from reviews.services import log_changes
+
+from ..utils.cache_utils import bump_versions
+from .serializers import SlugBulkSerializer, TitleBulkSerializer
+
+
+def bulk_create_with_ids(model, objs):
+    """bulk_create, после которого у объектов заполнены первичные ключи.
+
+    PostgreSQL возвращает ключи сам. SQLite - нет, но внутри транзакции
+    после первой вставки база заблокирована для других писателей, так
+    что новые строки - это последние len(objs) ключей по порядку.
+    """
+    with transaction.atomic():
+        model.objects.bulk_create(objs)
+        if objs and objs[0].pk is None:
+            pks = list(model.objects.order_by('-pk')
+                       .values_list('pk', flat=True)[:len(objs)])
+            for obj, pk in zip(objs, reversed(pks)):
+                obj.pk = pk
+    return objs
+
+
+class BulkWriter:
+    """Основа массовой записи.
+
+    Подклассы задают serializer_class, model, key (поле, по которому
+    объекты находятся при обновлении) и реализуют resolve(), create() и
+    update(). Ошибки копятся по индексам элементов запроса.
+    """
+
+    serializer_class = None
+    model = None
+    key = 'id'
+
+    def __init__(self, items, updating=False):
+        self.items = items
+        self.updating = updating
+        self.errors = {}
+        self.instances = {}
+
+    def add_error(self, index, field, message):
+        self.errors.setdefault(index, {}).setdefault(field, []).append(
+            message)
+
+    def validate(self):
+        """Проверяет элементы по одному, без запросов к БД."""
+        valid = {}
+        seen = set()
+        for index, item in enumerate(self.items):
+            serializer = self.serializer_class(
+                data=item, partial=self.updating)
+            if not serializer.is_valid():
+                self.errors[index] = serializer.errors
+                continue
+            data = dict(serializer.validated_data)
+            if not self.updating and self.key == 'id':
+                data.pop('id', None)
+            elif data.get(self.key) is None:
+                self.add_error(index, self.key, 'Обязательное поле.')
+                continue
+            elif data[self.key] in seen:
+                self.add_error(
+                    index, self.key, 'Значение повторяется в запросе.')
+                continue
+            else:
+                seen.add(data[self.key])
+            valid[index] = data
+        return valid
+
+    def resolve(self, valid):
+        """Разрешает ссылки пачки и добавляет ошибки."""
+        return valid
+
+    def run(self, atomic=False):
+        """Записывает корректные элементы и возвращает (results, errors).
+
+        При atomic и хотя бы одной ошибке ничего не записывается.
+        """
+        with transaction.atomic():
+            valid = self.resolve(self.validate())
+            valid = {index: data for index, data in valid.items()
+                     if index not in self.errors}
+            if valid and not (atomic and self.errors):
+                write = self.update if self.updating else self.create
+                results = write(valid)
+            else:
+                results = []
+        errors = [{'index': index, 'errors': errors}
+                  for index, errors in sorted(self.errors.items())]
+        return results, errors
+
+    def load_instances(self, valid):
+        """Находит обновляемые объекты одним запросом."""
+        found = self.model.objects.in_bulk(
+            [data[self.key] for data in valid.values()],
+            field_name=self.key)
+        for index, data in valid.items():
+            instance = found.get(data[self.key])
+            if instance is None:
+                self.add_error(index, self.key, 'Объект не найден.')
+            else:
+                self.instances[index] = instance
+
+
+class TitleBulkWriter(BulkWriter):
+    """Массовая запись произведений вместе со связями GenreTitle."""
+
+    serializer_class = TitleBulkSerializer
+    model = Title
+
+    def resolve(self, valid):
+        categories = Category.objects.in_bulk(
+            {data['category'] for data in valid.values()
+             if 'category' in data},
+            field_name='slug')
+        genres = Genre.objects.in_bulk(
+            {slug for data in valid.values()
+             for slug in data.get('genre', ())},
+            field_name='slug')
+        if self.updating:
+            self.load_instances(valid)
+        for index, data in valid.items():
+            if 'category' in data:
+                slug = data['category']
+                data['category'] = categories.get(slug)
+                if data['category'] is None:
+                    self.add_error(
+                        index, 'category', f'Категория {slug} не найдена.')
+            if 'genre' in data:
+                for slug in data['genre']:
+                    if slug not in genres:
+                        self.add_error(
+                            index, 'genre', f'Жанр {slug} не найден.')
+                data['genre'] = [genres[slug] for slug
+                                 in dict.fromkeys(data['genre'])
+                                 if slug in genres]
+        return valid
+
+    def create(self, valid):
+        titles = bulk_create_with_ids(Title, [
+            Title(**{field: value for field, value in data.items()
+                     if field != 'genre'})
+            for data in valid.values()])
+        GenreTitle.objects.bulk_create([
+            GenreTitle(title=title, genre=genre)
+            for title, data in zip(titles, valid.values())
+            for genre in data['genre']])
+        TitleStats.objects.bulk_create(
+            [TitleStats(title=title) for title in titles])
+        self.after_write(titles)
+        return [{'index': index, 'id': title.pk}
+                for index, title in zip(valid, titles)]
+
+    def update(self, valid):
+        titles = []
+        fields = set()
+        retagged = {}
+        for index, data in valid.items():
+            title = self.instances[index]
+            for field, value in data.items():
+                if field == 'genre':
+                    retagged[title.pk] = value
+                elif field != 'id':
+                    setattr(title, field, value)
+                    fields.add(field)
+            titles.append(title)
+        if fields:
+            Title.objects.bulk_update(titles, sorted(fields))
+        if retagged:
+            GenreTitle.objects.filter(title_id__in=retagged).delete()
+            GenreTitle.objects.bulk_create([
+                GenreTitle(title_id=pk, genre=genre)
+                for pk, genres in retagged.items() for genre in genres])
+        self.after_write(titles)
+        return [{'index': index, 'id': title.pk}
+                for index, title in zip(valid, titles)]
+
+    def after_write(self, titles):
+        index_titles(titles)
+        log_changes(Title, [title.pk for title in titles],
+                    ChangeLog.UPDATE if self.updating else ChangeLog.CREATE)
+        scopes = ['titles']
+        if self.updating:
+            scopes += [f'title:{title.pk}' for title in titles]
+        transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+class SlugBulkWriter(BulkWriter):
+    """Массовая запись жанров и категорий по слагу."""
+
+    serializer_class = SlugBulkSerializer
+    key = 'slug'
+    unique_fields = ()
+    scope = None
+
+    def resolve(self, valid):
+        if self.updating:
+            self.load_instances(valid)
+        else:
+            existing = set(self.model.objects.filter(
+                slug__in=[data['slug'] for data in valid.values()]
+            ).values_list('slug', flat=True))
+            for index, data in valid.items():
+                if data['slug'] in existing:
+                    self.add_error(
+                        index, 'slug', 'Объект с таким слагом уже есть.')
+        for field in self.unique_fields:
+            self.check_unique(valid, field)
+        return valid
+
+    def check_unique(self, valid, field):
+        """Проверяет уникальность поля в пачке и в базе одним запросом."""
+        values = {index: data[field] for index, data in valid.items()
+                  if field in data}
+        taken = set(self.model.objects.filter(
+            **{f'{field}__in': values.values()}
+        ).exclude(
+            slug__in=[data['slug'] for data in valid.values()]
+            if self.updating else []
+        ).values_list(field, flat=True))
+        seen = set()
+        for index, value in values.items():
+            if value in taken or value in seen:
+                self.add_error(
+                    index, field, 'Значение уже используется.')
+            seen.add(value)
+
+    def create(self, valid):
+        self.model.objects.bulk_create(
+            [self.model(**data) for data in valid.values()])
+        return self.after_write(valid)
+
+    def update(self, valid):
+        objs = []
+        for index, data in valid.items():
+            instance = self.instances[index]
+            instance.name = data.get('name', instance.name)
+            objs.append(instance)
+        self.model.objects.bulk_update(objs, ['name'])
+        return self.after_write(valid)
+
+    def after_write(self, valid):
+        transaction.on_commit(lambda: bump_versions(self.scope))
+        return [{'index': index, 'slug': data['slug']}
+                for index, data in valid.items()]
+
+
+class GenreBulkWriter(SlugBulkWriter):
+    model = Genre
+    scope = 'genres'
+
+
+class CategoryBulkWriter(SlugBulkWriter):
+    model = Category
+    scope = 'categories'
+    unique_fields = ('name',)
@@ -0,0 +1,87 @@
+"""Выгрузка каталога и отзывов целиком, потоком строк.
+
+Строки читаются через values_list().iterator(chunk_size), без
+пагинации, подсчета и создания объектов моделей, так что расход памяти
+не зависит от объема данных. Жанры произведений идут вторым потоком,
+упорядоченным по произведению, и сливаются с первым на лету.
+"""
+from itertools import groupby
+
+from django.conf import settings
+from reviews.models import Comment, GenreTitle, Review, Title
+
+
+class Export:
+    """Набор колонок и источник строк одной выгрузки."""
+
+    columns = ()
+    queryset = None
+    fields = ()
+
+    def __init__(self, since=None):
+        self.since = since
+        self.chunk_size = settings.API_EXPORT_CHUNK_SIZE
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def rows(self):
+        """Кортежи значений в порядке columns."""
+        return self.get_queryset().values_list(*self.fields).iterator(
+            chunk_size=self.chunk_size)
+
+
+class TitleExport(Export):
+    columns = ('id', 'name', 'year', 'description', 'category', 'genre',
+               'rating', 'rating_count')
+    queryset = Title.objects.order_by('pk')
+    fields = ('id', 'name', 'year', 'description', 'category__slug',
+              'rating', 'rating_count')
+
+    def rows(self):
+        genres = groupby(
+            GenreTitle.objects.order_by('title_id', 'pk')
+            .values_list('title_id', 'genre__slug')
+            .iterator(chunk_size=self.chunk_size),
+            key=lambda row: row[0])
+        title_id, slugs = next(genres, (None, ()))
+        for row in super().rows():
+            # Между двумя запросами произведение могли удалить: его
+            # жанры пропускаются.
+            while title_id is not None and title_id < row[0]:
+                title_id, slugs = next(genres, (None, ()))
+            if row[0] == title_id:
+                genre = [slug for _, slug in slugs]
+                title_id, slugs = next(genres, (None, ()))
+            else:
+                genre = []
+            yield row[:5] + (genre,) + row[5:]
+
+
+class DatedExport(Export):
+    """Выгрузка по дате публикации, с ?since= - только новые строки.
+
+    Строки идут по (pub_date, id), граница since включается: клиент
+    передает дату последней полученной строки и отбрасывает повторы
+    по id.
+    """
+
+    def get_queryset(self):
+        queryset = self.queryset.order_by('pub_date', 'pk')
+        if self.since is not None:
+            queryset = queryset.filter(pub_date__gte=self.since)
+        return queryset
+
+
+class ReviewExport(DatedExport):
+    columns = ('id', 'title', 'author', 'text', 'score', 'pub_date')
+    queryset = Review.objects.all()
+    fields = ('id', 'title_id', 'author__username', 'text', 'score',
+              'pub_date')
+
+
+class CommentExport(DatedExport):
+    columns = ('id', 'title', 'review', 'author', 'text', 'pub_date')
+    queryset = Comment.objects.all()
+    fields = ('id', 'review__title_id', 'review_id', 'author__username',
+              'text', 'pub_date')
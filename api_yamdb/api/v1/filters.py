@@ -1,15 +1,89 @@
-from django_filters import CharFilter, FilterSet
+from django.db import connections
+from django.db.models import F
+from django_filters import CharFilter, FilterSet, OrderingFilter
+from django_filters.constants import EMPTY_VALUES
 
 from reviews.models import Title
+from reviews.search import search_titles
+
+from ..utils.slug_cache import category_slugs, genre_slugs
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Сортировка с добавлением id в направлении последнего поля.
+
+    Одинаковые значения не перемешиваются между страницами, а порядок
+    целиком совпадает с составным индексом (поле, id), поэтому база
+    читает первые N строк индекса без сортировки.
+
+    NULL в полях nullable (рейтинг без отзывов) считается меньше любого
+    значения: при сортировке по убыванию такие строки идут последними.
+    SQLite так сортирует сама, а PostgreSQL по умолчанию ставит NULL
+    выше всех, поэтому там порядок задается явно и читается индексами
+    title_*rating_nulls_idx из миграции 0015.
+    """
+
+    nulls_smallest_vendors = ('sqlite', 'mysql')
+
+    def __init__(self, *args, nullable=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nullable = nullable
+
+    def order_expression(self, param, explicit_nulls):
+        ordering = self.get_ordering_value(param)
+        field = ordering.lstrip('-')
+        if not explicit_nulls or field not in self.nullable:
+            return ordering
+        if ordering.startswith('-'):
+            return F(field).desc(nulls_last=True)
+        return F(field).asc(nulls_first=True)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        explicit_nulls = (
+            connections[qs.db].vendor not in self.nulls_smallest_vendors)
+        ordering = [self.order_expression(param, explicit_nulls)
+                    for param in value]
+        tiebreaker = '-pk' if value[-1].startswith('-') else 'pk'
+        return qs.order_by(*ordering, tiebreaker)
 
 
 class TtileFilter(FilterSet):
     """Фильтр по произведениям."""
-    genre = CharFilter(field_name='genre__slug', lookup_expr='exact')
-    category = CharFilter(field_name='category__slug', lookup_expr='exact')
+    genre = CharFilter(method='filter_genre')
+    category = CharFilter(method='filter_category')
     name = CharFilter(field_name='name', lookup_expr='contains')
     year = CharFilter(field_name='year', lookup_expr='exact')
+    search = CharFilter(method='filter_search')
+    ordering = StableOrderingFilter(
+        fields=(
+            ('rating', 'rating'),
+            ('rating_count', 'reviews_count'),
+            ('year', 'year'),
+            ('name', 'name'),
+        ),
+        nullable=('rating',),
+    )
 
     class Meta:
         model = Title
-        fields = ['category', 'genre', 'year', 'name', ]
+        fields = ['category', 'genre', 'year', 'name', 'search', 'ordering', ]
+
+    def filter_genre(self, queryset, name, value):
+        """Фильтр по id жанра без соединения с таблицей жанров."""
+        pk = genre_slugs.get(value)
+        if pk is None:
+            return queryset.none()
+        return queryset.filter(genre=pk)
+
+    def filter_category(self, queryset, name, value):
+        """Фильтр по category_id без соединения с таблицей категорий."""
+        pk = category_slugs.get(value)
+        if pk is None:
+            return queryset.none()
+        return queryset.filter(category_id=pk)
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return search_titles(queryset, value)
@@ -0,0 +1,207 @@
+from functools import partial
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.shortcuts import get_object_or_404
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api_yamdb.middleware import current_metrics
+
+from ..utils.cache_utils import GLOBAL_SCOPE, get_versions, make_etag
+from .permissions import AdminSuperuserOnly
+
+
+class SerializerTimingMixin:
+    """Отмечает время сериализации для PerformanceMiddleware.
+
+    Замер идет от первого get_serializer до finalize_response за
+    вычетом времени запросов к БД в этом промежутке.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.start_serialize()
+        return super().get_serializer(*args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.stop_serialize()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class QueryPlanMixin:
+    """Применяет к queryset план загрузки связей для текущего действия.
+
+    План задается словарем query_plans: ключ - действие вьюсета
+    (или 'default'), значение - словарь с ключами select_related и
+    prefetch_related.
+    """
+
+    query_plans = {}
+
+    def get_query_plan(self):
+        return self.query_plans.get(
+            self.action, self.query_plans.get('default', {}))
+
+    def apply_query_plan(self, queryset):
+        plan = self.get_query_plan()
+        if plan.get('select_related'):
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        return queryset
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+
+class NestedResourceMixin:
+    """Находит родительский объект вложенного маршрута.
+
+    Родитель ищется одним запросом по всем полям parent_lookups
+    (поле модели -> параметр адреса), что заодно проверяет иерархию.
+    Результат кэшируется на вьюсете до конца запроса.
+    """
+
+    parent_model = None
+    parent_lookups = {}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_model,
+                **{field: self.kwargs.get(kwarg)
+                   for field, kwarg in self.parent_lookups.items()})
+        return self._parent
+
+
+class ConditionalResponseMixin:
+    """Условные ответы по версиям данных.
+
+    Валидаторы строятся по адресу запроса и версиям областей данных из
+    get_cache_scopes() и общей версии GLOBAL_SCOPE, которые сбрасываются
+    сигналами при записи. Если клиент прислал актуальные If-None-Match
+    или If-Modified-Since, возвращается 304 до запросов к БД и
+    сериализации.
+    """
+
+    cache_scopes = ()
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def get_validators(self, request):
+        versions = get_versions(GLOBAL_SCOPE, *self.get_cache_scopes())
+        etag = make_etag(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            *sorted(versions.items()))
+        return etag, max(versions.values())
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in parse_etags(if_none_match)
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'))
+        return (if_modified_since is not None
+                and int(last_modified) <= if_modified_since)
+
+    def conditional_response(self, request, get_response):
+        self.etag, last_modified = self.get_validators(request)
+        headers = {
+            'ETag': self.etag,
+            'Last-Modified': http_date(last_modified),
+        }
+        if self.is_not_modified(request, self.etag, last_modified):
+            return Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        response = get_response()
+        if response.status_code == HTTPStatus.OK:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+
+class ConditionalGetMixin(ConditionalResponseMixin):
+    """Отдает ETag и Last-Modified для списка и объекта."""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, partial(super().retrieve, request, *args, **kwargs))
+
+
+class CachedListMixin(ConditionalResponseMixin):
+    """Отдает список с ETag и Last-Modified и кэширует тело ответа.
+
+    Ключ кэша совпадает с ETag, поэтому смена версии области
+    инвалидирует все варианты поиска и пагинации сразу.
+    """
+
+    cache_timeout = settings.API_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        get_list = super().list
+
+        def cached_list():
+            key = f'api:list:{self.etag}'
+            data = cache.get(key)
+            if data is None:
+                data = get_list(request, *args, **kwargs).data
+                cache.set(key, data, self.cache_timeout)
+            return Response(data)
+
+        return self.conditional_response(request, cached_list)
+
+
+class BulkWriteMixin:
+    """Массовое создание (POST) и обновление (PATCH) списком объектов.
+
+    Доступно администраторам по адресу <ресурс>/bulk/. В ответе -
+    ключи записанных элементов и ошибки по индексам элементов. С
+    параметром ?atomic=true при любой ошибке ничего не записывается.
+    """
+
+    bulk_writer_class = None
+
+    def bulk_error(self, message):
+        return ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk',
+            url_name='bulk', permission_classes=(AdminSuperuserOnly,))
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise self.bulk_error('Ожидается непустой список объектов.')
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            raise self.bulk_error(
+                'Слишком много объектов, не больше '
+                f'{settings.API_BULK_MAX_ITEMS}.')
+        atomic = request.query_params.get('atomic', '').lower() in (
+            '1', 'true', 'yes')
+        writer = self.bulk_writer_class(
+            items, updating=request.method == 'PATCH')
+        try:
+            results, errors = writer.run(atomic=atomic)
+        except IntegrityError as e:
+            raise self.bulk_error(f'Ошибка целостности данных: {e}') from e
+
+        if not results and errors:
+            status = HTTPStatus.BAD_REQUEST
+        elif request.method == 'POST':
+            status = HTTPStatus.CREATED
+        else:
+            status = HTTPStatus.OK
+        return Response({'results': results, 'errors': errors},
+                        status=status)
@@ -44,4 +44,4 @@ class AdminSuperuserModeratorAuthorOrReadOnly(permissions.BasePermission):
                 and (request.user.is_superuser
                      or request.user.is_admin
                      or request.user.is_moderator
-                     or request.user == obj.author))
+                     or obj.author_id == request.user.id))
@@ -0,0 +1,86 @@
+import csv
+import json
+from itertools import islice
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamRenderer(renderers.BaseRenderer):
+    """Рендерер выгрузок, который умеет отдавать строки потоком.
+
+    stream() превращает колонки и итератор строк в итератор кусков
+    текста по batch_size строк. render() нужен для ответов с ошибками,
+    которые DRF рендерит выбранным рендерером.
+    """
+
+    charset = 'utf-8'
+    batch_size = 500
+
+    def header(self, columns):
+        return ''
+
+    def line(self, columns, row):
+        raise NotImplementedError
+
+    def stream(self, columns, rows):
+        yield self.header(columns)
+        rows = iter(rows)
+        while True:
+            batch = [self.line(columns, row)
+                     for row in islice(rows, self.batch_size)]
+            if not batch:
+                break
+            yield ''.join(batch)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        if not all(isinstance(item, dict) for item in items):
+            items = [{'detail': item} for item in items]
+        columns = list(dict.fromkeys(key for item in items for key in item))
+        rows = ([item.get(column) for column in columns] for item in items)
+        return ''.join(self.stream(columns, rows)).encode(self.charset)
+
+
+class NDJSONRenderer(StreamRenderer):
+    """Одна JSON строка на запись."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def line(self, columns, row):
+        return json.dumps(dict(zip(columns, row)), cls=JSONEncoder,
+                          ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamRenderer):
+    """CSV с заголовком; списки записываются через запятую."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+        self.encoder = JSONEncoder()
+
+    def value(self, value):
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, (list, tuple)):
+            return ','.join(str(item) for item in value)
+        return self.encoder.default(value)
+
+    def header(self, columns):
+        return self.writer.writerow(columns)
+
+    def line(self, columns, row):
+        return self.writer.writerow([self.value(value) for value in row])
@@ -1,11 +1,21 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
+from django.db import router, transaction
 from django.db.utils import IntegrityError
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import ValidationError
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (Category, ChangeLog, Comment, Genre, Review,
+                            Title, TitleStats)
+
+from ..utils.slug_cache import category_slugs, genre_slugs
 
 User = get_user_model()
 
+# Слаги, которые совпадают с маршрутами списка категорий и жанров.
+RESERVED_SLUGS = ('bulk',)
+
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     """Сериализатор пользователя при самостоятельное регистрации.
@@ -54,6 +64,17 @@ class ConfirmationCodeSerializer(serializers.Serializer):
     )
 
 
+def validate_slug(slug):
+    """Запрещает слаги, совпадающие с маршрутами списка.
+
+    Адрес categories/bulk/ занят массовой записью, и объект со слагом
+    bulk нельзя было бы удалить.
+    """
+    if slug.lower() in RESERVED_SLUGS:
+        raise serializers.ValidationError('Выберите другой слаг')
+    return slug
+
+
 class CategorySerializer(serializers.HyperlinkedModelSerializer):
     """Сериалайзер категорий."""
 
@@ -62,6 +83,9 @@ class CategorySerializer(serializers.HyperlinkedModelSerializer):
         fields = ('name', 'slug',)
         lookup_field = 'slug'
 
+    def validate_slug(self, slug):
+        return validate_slug(slug)
+
 
 class GenreSerializer(serializers.HyperlinkedModelSerializer):
     """Сериалайзер жанров."""
@@ -71,34 +95,125 @@ class GenreSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('name', 'slug',)
         lookup_field = ('slug')
 
+    def validate_slug(self, slug):
+        return validate_slug(slug)
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """Связь по слагу, который разрешается через SlugCache.
+
+    Вместо объекта из БД возвращает объект только с pk и слагом (прочие
+    поля отложены): для записи внешнего ключа и связей этого достаточно.
+    """
+
+    default_error_messages = {
+        'does_not_exist': 'Объект со слагом {value} не существует.',
+        'invalid': 'Некорректное значение.',
+    }
+
+    def __init__(self, slug_cache, **kwargs):
+        self.slug_cache = slug_cache
+        kwargs.setdefault('slug_field', 'slug')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        pk = self.slug_cache.get(data)
+        if pk is None:
+            self.fail('does_not_exist', value=data)
+        model = self.slug_cache.model
+        return model.from_db(
+            router.db_for_read(model), ['id', 'slug'], [pk, data])
+
 
 class TitleSerializerPost(serializers.ModelSerializer):
     """Сериализатор для получения Произведений."""
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
+        category_slugs,
         queryset=Category.objects.all(),
-        slug_field='slug'
     )
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        genre_slugs,
         queryset=Genre.objects.all(),
-        slug_field='slug',
         many=True
     )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category',)
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой записи произведений.
+
+    Жанры и категория принимаются слагами без обращения к БД, их
+    существование проверяется для всей пачки сразу.
+    """
+
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(),
+        allow_empty=False
+    )
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category',)
+
+
+class SlugBulkSerializer(serializers.Serializer):
+    """Элемент массовой записи жанров и категорий.
+
+    Уникальность проверяется для всей пачки одним запросом, поэтому
+    валидаторов уникальности у полей нет.
+    """
+
+    name = serializers.CharField(max_length=256)
+    slug = serializers.SlugField(max_length=50, validators=[validate_slug])
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Сериализатор статистики отзывов на произведение."""
+
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta:
+        model = TitleStats
+        fields = ('histogram', 'count', 'last_review_date',)
 
 
 class TitleSerializerGet(serializers.ModelSerializer):
-    """Сериализатор для вывода Произведений."""
+    """Сериализатор для вывода Произведений.
+
+    Поля из expandable_fields добавляются, только если их имена
+    переданы в context['expand'].
+    """
 
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     rating = serializers.IntegerField()
 
+    expandable_fields = {
+        'stats': partial(TitleStatsSerializer, read_only=True,
+                         allow_null=True),
+    }
+
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'rating', 'description', 'genre',
+                  'category',)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.context.get('expand', ()):
+            if name in self.expandable_fields:
+                fields[name] = self.expandable_fields[name]()
+        return fields
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -123,17 +238,58 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
-    def validate(self, data):
-        """Проверка на возможность создания отзыва."""
-        request = self.context.get('request')
-        if request.method == 'POST':
-            title_id = self.context.get('view').kwargs.get('title_id')
-            if Review.objects.filter(
-                    author=request.user, title=title_id).exists():
-                raise serializers.ValidationError(
-                    'Вы уже оставили отзыв на это произведение')
-        return data
+    def create(self, validated_data):
+        """Создание отзыва с проверкой уникальности на стороне БД.
+
+        Повторный отзыв отсекает ограничение unique_review, ошибка
+        которого превращается в обычный ответ 400.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as e:
+            if 'unique' not in str(e).lower():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставили отзыв на это произведение'],
+            }) from e
 
     class Meta:
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date',)
+
+
+class ReviewChangeSerializer(ReviewSerializer):
+    """Отзыв в ленте изменений, с произведением."""
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class CommentChangeSerializer(CommentSerializer):
+    """Комментарий в ленте изменений, с отзывом и произведением."""
+
+    title = serializers.IntegerField(source='review.title_id')
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('review', 'title')
+
+
+class ChangeLogSerializer(serializers.ModelSerializer):
+    """Строка ленты изменений.
+
+    data - текущее состояние объекта из context['objects'] или None,
+    если объект уже удален.
+    """
+
+    cursor = serializers.IntegerField(source='pk')
+    id = serializers.IntegerField(source='object_id')
+    data = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChangeLog
+        fields = ('cursor', 'model', 'id', 'action', 'changed_at', 'data')
+
+    def get_data(self, change):
+        return self.context['objects'].get((change.model, change.object_id))
@@ -0,0 +1,173 @@
+"""Ограничение частоты запросов к открытым эндпоинтам аутентификации.
+
+Корзина токенов: у ключа (IP, имя пользователя, email) есть запас
+запросов на всплеск, который равномерно пополняется со скоростью из
+DEFAULT_THROTTLE_RATES. Проверка идет в initial() вьюхи, до разбора
+сериализатором, поэтому отклоненный запрос не доходит ни до БД, ни до
+почты.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+from hashlib import md5
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from ..utils.cache_utils import shared_cache
+
+
+class LocalBuckets:
+    """Состояния корзин в памяти процесса, когда общий кэш недоступен."""
+
+    def __init__(self, size=10000):
+        self.size = size
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def get_many(self, keys):
+        with self.lock:
+            return {key: self.buckets[key] for key in keys
+                    if key in self.buckets}
+
+    def set_many(self, data, timeout=None):
+        with self.lock:
+            for key, value in data.items():
+                self.buckets[key] = value
+                self.buckets.move_to_end(key)
+            while len(self.buckets) > self.size:
+                self.buckets.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class ThrottleStats:
+    """Счетчики пропущенных и отклоненных запросов по областям."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def add(self, scope, name):
+        with self.lock:
+            self.counters[scope][name] += 1
+
+    def clear(self):
+        with self.lock:
+            self.counters = defaultdict(
+                lambda: {'allowed': 0, 'throttled': 0, 'fallback': 0})
+
+    def summary(self):
+        with self.lock:
+            return {scope: dict(counters)
+                    for scope, counters in sorted(self.counters.items())}
+
+
+local_buckets = LocalBuckets()
+throttle_stats = ThrottleStats()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Корзина токенов поверх общего для процессов кэша shared_cache().
+
+    Частота '5/min' - это запас на 5 запросов подряд и пополнение на
+    один запрос каждые 12 секунд. Запрос проходит, только если во всех
+    его корзинах есть токен. Чтение и запись кэша не атомарны, поэтому
+    при гонке пара лишних запросов может пройти - для защиты от
+    всплесков этого достаточно. Если кэш недоступен, корзины ведутся в
+    памяти процесса.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    @property
+    def cache(self):
+        # Не кэш по умолчанию DRF: в LocMemCache у каждого воркера свои
+        # корзины, и лимит умножается на число процессов.
+        return shared_cache()
+
+    def get_idents(self, request):
+        """Значения, по которым ведутся корзины запроса."""
+        return [self.get_ident(request)]
+
+    def get_cache_key(self, request, view):
+        # Ключей у запроса несколько, их строит allow_request().
+        return None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        keys = [self.cache_format % {'scope': self.scope, 'ident': ident}
+                for ident in self.get_idents(request)]
+        if not keys:
+            return True
+        self.now = self.timer()
+        refill = self.num_requests / self.duration
+        try:
+            storage = self.cache
+            states = storage.get_many(keys)
+        except Exception:
+            throttle_stats.add(self.scope, 'fallback')
+            storage = local_buckets
+            states = storage.get_many(keys)
+
+        tokens = {}
+        for key in keys:
+            left, updated = states.get(key, (self.num_requests, self.now))
+            tokens[key] = min(
+                self.num_requests, left + (self.now - updated) * refill)
+        lowest = min(tokens.values())
+        if lowest < 1:
+            self.wait_time = (1 - lowest) / refill
+            throttle_stats.add(self.scope, 'throttled')
+            return False
+
+        data = {key: (left - 1, self.now) for key, left in tokens.items()}
+        try:
+            storage.set_many(data, timeout=self.duration)
+        except Exception:
+            throttle_stats.add(self.scope, 'fallback')
+            local_buckets.set_many(data)
+        throttle_stats.add(self.scope, 'allowed')
+        return True
+
+    def wait(self):
+        return getattr(self, 'wait_time', None)
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """Корзины по значениям полей запроса, например username и email.
+
+    Значения приводятся к нижнему регистру и хешируются, чтобы длина
+    ключа кэша не зависела от присланных данных.
+    """
+
+    fields = ()
+
+    def get_idents(self, request):
+        data = request.data if hasattr(request.data, 'get') else {}
+        idents = []
+        for field in self.fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                value = value.strip().lower().encode()
+                idents.append(f'{field}:{md5(value).hexdigest()}')
+        return idents
+
+
+class SignupRateThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class SignupIdentityThrottle(IdentityThrottle):
+    scope = 'signup_identity'
+    fields = ('username', 'email')
+
+
+class TokenRateThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+
+class TokenIdentityThrottle(IdentityThrottle):
+    scope = 'token_identity'
+    fields = ('username',)
@@ -14,6 +14,9 @@ v1_router.register(r'users', views.UserViewSet, basename='users')
 v1_router.register(r'categories', views.CategoryViewSet, basename='categories')
 v1_router.register(r'genres', views.GenreViewSet, basename='genres')
 v1_router.register(r'titles', views.TitleViewSet, basename='titles')
+v1_router.register(r'perf', views.PerformanceViewSet, basename='perf')
+v1_router.register(r'export', views.ExportViewSet, basename='export')
+v1_router.register(r'changes', views.ChangeViewSet, basename='changes')
 v1_router.register(
     r'titles/(?P<title_id>\d+)/reviews',
     views.ReviewViewSet,
@@ -1,37 +1,63 @@
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
 from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import filters, mixins, permissions, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Title, Review
+from reviews.models import (Category, ChangeLog, Comment, Genre, Review,
+                            Title, TitleStats)
+from reviews.services import rebuild_title_stats
+
+from api_yamdb.middleware import route_stats
 
 from ..utils.auth_utils import send_confirmation_code
+from ..utils.user_cache import user_cache
+from .authentication import access_token_for_user, db_user
+from .bulk import CategoryBulkWriter, GenreBulkWriter, TitleBulkWriter
+from .export import CommentExport, ReviewExport, TitleExport
 from .filters import TtileFilter
+from .mixins import (BulkWriteMixin, CachedListMixin, ConditionalGetMixin,
+                     NestedResourceMixin, QueryPlanMixin,
+                     SerializerTimingMixin)
+from .pagination import LimitOffsetOrKeysetPagination
 from .permissions import (AdminSuperuserModeratorAuthorOrReadOnly,
                           AdminSuperuserOnly, AdminSuperuserOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
+from .renderers import CSVRenderer, NDJSONRenderer
+from .serializers import (CategorySerializer, ChangeLogSerializer,
+                          CommentChangeSerializer, CommentSerializer,
                           ConfirmationCodeSerializer, GenreSerializer,
-                          ReviewSerializer, TitleSerializerGet,
-                          TitleSerializerPost, UserRegisterSerializer,
+                          ReviewChangeSerializer, ReviewSerializer,
+                          TitleSerializerGet, TitleSerializerPost,
+                          TitleStatsSerializer, UserRegisterSerializer,
                           UserSerializer)
+from .throttling import (SignupIdentityThrottle, SignupRateThrottle,
+                         TokenIdentityThrottle, TokenRateThrottle,
+                         throttle_stats)
 
 User = get_user_model()
 
 
-class UserRegisterViewSet(viewsets.GenericViewSet):
+class UserRegisterViewSet(SerializerTimingMixin, viewsets.GenericViewSet):
     """Вьюсет для самостоятельной регистрации пользователей.
 
     После создания отправляет email с кодом подтверждения.
     """
 
     serializer_class = UserRegisterSerializer
+    authentication_classes = ()
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (SignupRateThrottle, SignupIdentityThrottle)
 
     def create(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -43,14 +69,16 @@ class UserRegisterViewSet(viewsets.GenericViewSet):
         return Response(serializer.data, status=HTTPStatus.OK)
 
 
-class TokenCreateViewSet(viewsets.GenericViewSet):
+class TokenCreateViewSet(SerializerTimingMixin, viewsets.GenericViewSet):
     """Вьюсет для создания JWT токена.
 
     Токен будет создан если код подтверждения полученный по email валиден.
     """
 
     serializer_class = ConfirmationCodeSerializer
+    authentication_classes = ()
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenRateThrottle, TokenIdentityThrottle)
 
     def create(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -67,11 +95,11 @@ class TokenCreateViewSet(viewsets.GenericViewSet):
                 {'error': 'Код подтверждения неверен или устарел'},
                 status=HTTPStatus.BAD_REQUEST)
         return Response(
-            {'token': str(AccessToken.for_user(user))},
+            {'token': str(access_token_for_user(user))},
             status=HTTPStatus.OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """Вьюсет для получения и обновления информации о пользователях."""
 
     queryset = User.objects.all().order_by('date_joined')
@@ -89,23 +117,31 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_patch_current_user_data(self, request):
         """Метод для получения и обновления информации о текущем юзере."""
         if request.method == 'PATCH':
+            # Пользователь из кэша может отставать на TTL, а сохраняются
+            # все поля, поэтому для записи он читается из БД.
+            user = get_object_or_404(User, pk=request.user.pk)
             serializer = self.serializer_class(
-                request.user, data=request.data, partial=True)
+                user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role, partial=True)
+            serializer.save(role=user.role, partial=True)
 
         if request.method == 'GET':
-            serializer = self.serializer_class(request.user)
+            serializer = self.serializer_class(db_user(request.user))
 
         return Response(serializer.data, status=HTTPStatus.OK)
 
 
-class CategoryViewSet(mixins.CreateModelMixin,
+class CategoryViewSet(SerializerTimingMixin,
+                      CachedListMixin,
+                      BulkWriteMixin,
+                      mixins.CreateModelMixin,
                       mixins.DestroyModelMixin,
                       mixins.ListModelMixin,
                       viewsets.GenericViewSet):
     """Вьюсет для Категорий."""
 
+    cache_scopes = ('categories',)
+    bulk_writer_class = CategoryBulkWriter
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
@@ -115,12 +151,17 @@ class CategoryViewSet(mixins.CreateModelMixin,
     permission_classes = (AdminSuperuserOrReadOnly,)
 
 
-class GenreViewSet(mixins.CreateModelMixin,
+class GenreViewSet(SerializerTimingMixin,
+                   CachedListMixin,
+                   BulkWriteMixin,
+                   mixins.CreateModelMixin,
                    mixins.DestroyModelMixin,
                    mixins.ListModelMixin,
                    viewsets.GenericViewSet):
     """Вьюсет для Жанров."""
 
+    cache_scopes = ('genres',)
+    bulk_writer_class = GenreBulkWriter
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     lookup_field = 'slug'
@@ -130,67 +171,278 @@ class GenreViewSet(mixins.CreateModelMixin,
     permission_classes = (AdminSuperuserOrReadOnly,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(SerializerTimingMixin, ConditionalGetMixin,
+                   QueryPlanMixin, BulkWriteMixin, viewsets.ModelViewSet):
     """Вьюсет для произведений."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+
+    bulk_writer_class = TitleBulkWriter
+    query_plans = {
+        'default': {
+            'select_related': ('category',),
+            'prefetch_related': ('genre',),
+        },
+    }
+    queryset = Title.objects.all()
     pagination_class = LimitOffsetPagination
     filterset_class = TtileFilter
     filterset_fields = ('name', 'year', 'category', 'genre',)
     permission_classes = (AdminSuperuserOrReadOnly,)
 
+    def get_cache_scopes(self):
+        if self.action == 'stats':
+            return (f'title:{self.kwargs.get("pk")}',)
+        if self.action == 'retrieve':
+            return (f'title:{self.kwargs.get("pk")}', 'categories', 'genres')
+        return ('titles', 'categories', 'genres')
+
+    def get_expand(self):
+        """Имена вложенных полей из параметра ?expand=stats,..."""
+        return {name for name in
+                self.request.query_params.get('expand', '').split(',')
+                if name}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'stats' in self.get_expand():
+            queryset = queryset.select_related('stats')
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return TitleSerializerGet
+        if self.action == 'stats':
+            return TitleStatsSerializer
 
         return TitleSerializerPost
 
-
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'], url_path='stats',
+            url_name='stats')
+    def stats(self, request, pk=None):
+        """Гистограмма оценок, число отзывов и дата последнего отзыва."""
+        return self.conditional_response(
+            request, partial(self.get_stats_response, pk))
+
+    def get_stats_response(self, pk):
+        try:
+            stats = TitleStats.objects.get(pk=pk)
+        except (TitleStats.DoesNotExist, ValueError):
+            title = self.get_object()
+            rebuild_title_stats([title.pk])
+            stats = TitleStats.objects.get(pk=title.pk)
+        return Response(self.get_serializer(stats).data, status=HTTPStatus.OK)
+
+
+class CommentViewSet(SerializerTimingMixin, ConditionalGetMixin,
+                     NestedResourceMixin, QueryPlanMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для комментариев к произведениям."""
 
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    query_plans = {
+        'default': {'select_related': ('author',)},
+    }
     serializer_class = CommentSerializer
     permission_classes = (AdminSuperuserModeratorAuthorOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrKeysetPagination
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return (f'comment:{self.kwargs.get("pk")}', 'users')
+        return (f'comments:{self.kwargs.get("review_id")}', 'users')
 
     def get_queryset(self):
         """Возвращает комментарии к отзывам."""
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-
-        title = get_object_or_404(Title, id=title_id)
-        review = get_object_or_404(Review, id=review_id, title=title)
-
-        return review.comments.all()
+        return self.apply_query_plan(self.get_parent().comments.all())
 
     def perform_create(self, serializer):
         """Добавление автора комментария и отзыв."""
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-
-        title = get_object_or_404(Title, id=title_id)
-        review = get_object_or_404(Review, id=review_id, title=title)
-
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=db_user(self.request.user),
+                        review=self.get_parent())
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SerializerTimingMixin, ConditionalGetMixin,
+                    NestedResourceMixin, QueryPlanMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для отзывов к произведениям."""
 
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+    query_plans = {
+        'default': {'select_related': ('author',)},
+    }
     serializer_class = ReviewSerializer
     permission_classes = (AdminSuperuserModeratorAuthorOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrKeysetPagination
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return (f'review:{self.kwargs.get("pk")}', 'users')
+        return (f'reviews:{self.kwargs.get("title_id")}', 'users')
 
     def get_queryset(self):
         """Возвращает отзывы к произведению."""
-        title_id = self.kwargs.get('title_id')
-
-        title = get_object_or_404(Title, id=title_id)
-
-        return title.reviews.all()
+        return self.apply_query_plan(self.get_parent().reviews.all())
 
     def perform_create(self, serializer):
         """Добавление автора отзыва и произведения."""
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
+        serializer.save(author=db_user(self.request.user),
+                        title=self.get_parent())
+
+
+class PerformanceViewSet(viewsets.ViewSet):
+    """Статистика времени ответа по маршрутам для администраторов."""
+
+    permission_classes = (AdminSuperuserOnly,)
+
+    def list(self, request):
+        return Response({
+            'enabled': settings.PERF_METRICS_ENABLED,
+            'routes': route_stats.summary(),
+            'user_cache': user_cache.stats(),
+            'throttles': throttle_stats.summary(),
+        }, status=HTTPStatus.OK)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Потоковая выгрузка произведений, отзывов и комментариев.
+
+    Формат выбирается заголовком Accept или параметром
+    ?format=ndjson|csv. Отзывы и комментарии можно выгружать
+    частями: ?since=<pub_date> отдает строки начиная с этой даты.
+    """
+
+    permission_classes = (AdminSuperuserOnly,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+
+    def get_since(self):
+        value = self.request.query_params.get('since')
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise ValidationError(
+                {'since': 'Укажите дату в формате ISO 8601.'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def stream(self, export):
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(export.columns, export.rows()),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.action}.{renderer.format}"')
+        return response
+
+    @action(detail=False)
+    def titles(self, request, *args, **kwargs):
+        return self.stream(TitleExport())
+
+    @action(detail=False)
+    def reviews(self, request, *args, **kwargs):
+        return self.stream(ReviewExport(since=self.get_since()))
+
+    @action(detail=False)
+    def comments(self, request, *args, **kwargs):
+        return self.stream(CommentExport(since=self.get_since()))
+
+
+class ChangeViewSet(viewsets.ViewSet):
+    """Лента изменений произведений, отзывов и комментариев.
+
+    ?since=<cursor> отдает строки журнала с курсором больше переданного,
+    не больше ?limit= за раз; ?model=review,comment сужает ленту. Клиент
+    сохраняет next и передает его в следующем запросе, has_more
+    означает, что за ним есть еще строки. Создание и изменение стоит
+    применять как upsert: после compact_changes от объекта остается
+    только последняя строка.
+
+    Курсор - автоинкрементный id, а PostgreSQL выдает его до коммита:
+    строка N+1 может стать видна раньше строки N, и клиент, ушедший
+    курсором за N+1, никогда не получит N. Поэтому лента отдает только
+    строки старше CHANGE_FEED_LAG секунд и обрывает страницу на первой
+    более свежей. Транзакции, которые пишут в журнал, должны укладываться
+    в этот запас.
+    """
 
-        serializer.save(author=self.request.user, title=title)
+    permission_classes = (AdminSuperuserOnly,)
+    default_limit = 500
+    max_limit = 1000
+    sources = {
+        'title': (Title.objects.select_related('category')
+                  .prefetch_related('genre'), TitleSerializerGet),
+        'review': (Review.objects.select_related('author'),
+                   ReviewChangeSerializer),
+        'comment': (Comment.objects.select_related('author', 'review'),
+                    CommentChangeSerializer),
+    }
+
+    def get_number(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            raise ValidationError({name: 'Ожидается целое число >= 0.'})
+        return number
+
+    def get_models(self):
+        value = self.request.query_params.get('model')
+        if not value:
+            return None
+        models = value.split(',')
+        unknown = set(models) - self.sources.keys()
+        if unknown:
+            raise ValidationError(
+                {'model': f'Неизвестные модели: {", ".join(sorted(unknown))}'})
+        return models
+
+    def load_objects(self, changes):
+        """Текущие состояния объектов страницы: запрос на модель."""
+        ids = defaultdict(set)
+        for change in changes:
+            if change.action != ChangeLog.DELETE:
+                ids[change.model].add(change.object_id)
+        objects = {}
+        for model, pks in ids.items():
+            queryset, serializer_class = self.sources[model]
+            instances = list(queryset.filter(pk__in=pks))
+            data = serializer_class(instances, many=True).data
+            objects.update(((model, instance.pk), item)
+                           for instance, item in zip(instances, data))
+        return objects
+
+    def list(self, request):
+        since = self.get_number('since', 0)
+        limit = min(self.get_number('limit', self.default_limit),
+                    self.max_limit) or self.default_limit
+        changes = ChangeLog.objects.filter(pk__gt=since).order_by('pk')
+        models = self.get_models()
+        if models is not None:
+            changes = changes.filter(model__in=models)
+        changes = list(changes[:limit + 1])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        settled = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_LAG)
+        for index, change in enumerate(changes):
+            if change.changed_at > settled:
+                changes, has_more = changes[:index], False
+                break
+        serializer = ChangeLogSerializer(
+            changes, many=True,
+            context={'objects': self.load_objects(changes)})
+        return Response({
+            'next': changes[-1].pk if changes else since,
+            'has_more': has_more,
+            'results': serializer.data,
+        }, status=HTTPStatus.OK)
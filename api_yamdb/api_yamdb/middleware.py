@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Затраты одного запроса: время, запросы к БД, сериализация."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self._serialize_started = None
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_count += 1
+            self.db_time += time.perf_counter() - started
+
+    def start_serialize(self):
+        if self._serialize_started is None:
+            self._serialize_started = (time.perf_counter(), self.db_time)
+
+    def stop_serialize(self):
+        if self._serialize_started is None:
+            return
+        started, db_time = self._serialize_started
+        self.serialize_time += (time.perf_counter() - started
+                                - (self.db_time - db_time))
+        self._serialize_started = None
+
+
+def current_metrics():
+    """Метрики текущего запроса или None, если замер выключен."""
+    return getattr(_local, 'metrics', None)
+
+
+def percentile(values, share):
+    index = min(len(values) - 1, int(round(share * (len(values) - 1))))
+    return values[index]
+
+
+class RouteStats:
+    """Скользящее окно последних замеров по маршрутам."""
+
+    fields = ('total', 'db', 'db_count', 'serialize', 'size')
+
+    def __init__(self, window):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+
+    def add(self, route, sample):
+        with self.lock:
+            self.samples[route].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        with self.lock:
+            samples = {route: list(values)
+                       for route, values in self.samples.items()}
+        result = {}
+        for route, values in sorted(samples.items()):
+            columns = dict(zip(self.fields, zip(*values)))
+            total = sorted(columns['total'])
+            result[route] = {
+                'count': len(values),
+                'p50_ms': percentile(total, 0.5),
+                'p95_ms': percentile(total, 0.95),
+                'p99_ms': percentile(total, 0.99),
+                'avg_db_ms': sum(columns['db']) / len(values),
+                'avg_db_queries': sum(columns['db_count']) / len(values),
+                'avg_serialize_ms': sum(columns['serialize']) / len(values),
+                'avg_size_bytes': sum(columns['size']) / len(values),
+            }
+        return result
+
+
+route_stats = RouteStats(settings.PERF_METRICS_WINDOW)
+
+
+class PerformanceMiddleware:
+    """Замеряет стоимость запроса и отдает ее в заголовке Server-Timing.
+
+    Запросы к БД считаются через execute_wrapper, поэтому DEBUG не
+    нужен. При выключенном PERF_METRICS_ENABLED middleware не
+    подключается вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+
+        total = (time.perf_counter() - metrics.started) * 1000
+        db = metrics.db_time * 1000
+        serialize = metrics.serialize_time * 1000
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={total:.2f}',
+            f'db;desc="{metrics.db_count} queries";dur={db:.2f}',
+            f'serialize;dur={serialize:.2f}',
+        ))
+
+        match = request.resolver_match
+        if match is not None:
+            size = (0 if response.streaming else len(response.content))
+            route_stats.add(
+                f'{request.method} {match.view_name}',
+                (total, db, metrics.db_count, serialize, size))
+        return response
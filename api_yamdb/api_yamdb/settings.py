@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 from datetime import timedelta
 
 from dotenv import load_dotenv
@@ -30,12 +32,13 @@ INSTALLED_APPS = [
     'rest_framework',
     'django_filters',
     'rest_framework_simplejwt',
-    'reviews',
-    'api',
+    'reviews.apps.ReviewsConfig',
+    'api.apps.ApiConfig',
     'users',
 ]
 
 MIDDLEWARE = [
+    'api_yamdb.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,6 +48,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Замер стоимости запросов: заголовок Server-Timing и статистика
+# по маршрутам в /api/v1/perf/.
+PERF_METRICS_ENABLED = os.getenv('PERF_METRICS_ENABLED', 'False') == 'True'
+PERF_METRICS_WINDOW = int(os.getenv('PERF_METRICS_WINDOW', 1000))
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -73,10 +81,90 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Тестовая база в файле: в памяти SQLite не ждет блокировок
+        # параллельных соединений, а сразу падает с ошибкой.
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
 
+# Cache
+
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', 'yamdb')
+
+# Кэши, которые каждый процесс держит у себя.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Каталог файловых кэшей shared и revocations, если основной кэш
+# локальный. Тесты задают свой каталог, чтобы не трогать кэши dev-сервера.
+FILE_CACHE_DIR = os.getenv(
+    'FILE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'yamdb_cache'))
+
+
+def process_shared_cache(name, max_entries):
+    """Кэш, общий для процессов: основной или файловый, если тот локальный.
+
+    Переменные <NAME>_CACHE_BACKEND и <NAME>_CACHE_LOCATION задают его
+    явно, например Redis для нескольких серверов.
+    """
+    local = CACHE_BACKEND in LOCAL_CACHE_BACKENDS
+    prefix = name.upper()
+    return {
+        'BACKEND': os.getenv(
+            f'{prefix}_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+            if local else CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            f'{prefix}_CACHE_LOCATION',
+            os.path.join(FILE_CACHE_DIR, name) if local else CACHE_LOCATION),
+        'KEY_PREFIX': name,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+    },
+    # Версии данных для ETag и второй уровень кэша пользователей. Записей
+    # много, при переполнении часть вытесняется - это лишь сбрасывает
+    # закэшированные ответы.
+    'shared': process_shared_cache('shared', 100000),
+    # Отметки об отзыве claims токенов. Их мало (смена роли, блокировка,
+    # удаление), живут не дольше токена, и терять их нельзя, поэтому они
+    # отдельно от версий и без вытеснения. Для Redis выберите базу с
+    # политикой noeviction.
+    'revocations': process_shared_cache('revocations', sys.maxsize),
+}
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', 1000))
+
+# Сколько строк выгрузки /api/v1/export/ читается из БД за раз.
+API_EXPORT_CHUNK_SIZE = int(os.getenv('API_EXPORT_CHUNK_SIZE', 2000))
+
+# Лента /api/v1/changes/ отдает строки журнала старше этого числа секунд:
+# id выдаются до коммита, и более свежая строка может обогнать еще не
+# закоммиченную предыдущую.
+CHANGE_FEED_LAG = float(os.getenv('CHANGE_FEED_LAG', 10))
+
+# Кэш пользователей для JWT аутентификации: LRU в памяти процесса с
+# коротким TTL (0 в AUTH_USER_CACHE_SIZE выключает его) и общий кэш.
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 10000))
+AUTH_USER_CACHE_TTL = float(os.getenv('AUTH_USER_CACHE_TTL', 5))
+AUTH_USER_CACHE_SHARED = os.getenv('AUTH_USER_CACHE_SHARED', 'True') == 'True'
+AUTH_USER_CACHE_SHARED_TTL = int(os.getenv('AUTH_USER_CACHE_SHARED_TTL', 60))
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -122,9 +210,24 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # EMAIL_HOST = 'localhost'
 # EMAIL_PORT = 1025
 
+# Письма ставятся в очередь и отправляются командой send_queued_emails.
+# В режиме EMAIL_OUTBOX_EAGER письмо отправляется сразу при постановке.
+# Без переменной окружения (None) сразу отправляют только локальные
+# бэкенды: файловый, locmem и консольный.
+EMAIL_OUTBOX_EAGER = (
+    os.getenv('EMAIL_OUTBOX_EAGER') == 'True'
+    if os.getenv('EMAIL_OUTBOX_EAGER') else None
+)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+EMAIL_OUTBOX_LEASE = 300
+EMAIL_BATCH_MAX_SIZE = int(os.getenv('EMAIL_BATCH_MAX_SIZE', 100))
+EMAIL_BATCH_MAX_WAIT = float(os.getenv('EMAIL_BATCH_MAX_WAIT', 2))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -132,7 +235,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': (
-        'django_filters.rest_framework.DjangoFilterBackend',)
+        'django_filters.rest_framework.DjangoFilterBackend',),
+    # Корзины токенов для auth/signup/ и auth/token/: по IP и по
+    # username/email. Формат DRF: запросов/период (s, m, h, d).
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP', '30/hour'),
+        'signup_identity': os.getenv('THROTTLE_SIGNUP_IDENTITY', '5/hour'),
+        'token': os.getenv('THROTTLE_TOKEN', '60/hour'),
+        'token_identity': os.getenv('THROTTLE_TOKEN_IDENTITY', '10/hour'),
+    },
 }
 
 SIMPLE_JWT = {
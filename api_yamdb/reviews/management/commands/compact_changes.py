@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.services import compact_change_log
+
+
+class Command(BaseCommand):
+    help = ('Сжатие журнала изменений: удаление старых строк и строк, '
+            'перекрытых более поздними изменениями того же объекта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Сколько дней хранить журнал. 0 - не удалять по возрасту.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество строк в одном DELETE.',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError(
+                '--days не может быть отрицательным, '
+                '--batch-size должен быть больше нуля')
+        keep_since = None
+        if options['days']:
+            keep_since = timezone.now() - timedelta(days=options['days'])
+        expired, superseded = compact_change_log(
+            keep_since, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено устаревших строк: {expired}, '
+            f'перекрытых: {superseded}'))
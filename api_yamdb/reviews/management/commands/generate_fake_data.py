@@ -0,0 +1,364 @@
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.services import refresh_denormalized
+from users.models import User
+
+DEFAULT_COUNTS = {
+    'categories': 10,
+    'genres': 50,
+    'titles': 10000,
+    'users': 5000,
+    'reviews': 200000,
+    'comments': 200000,
+}
+
+# Даты публикации отсчитываются назад от этого момента, а не от текущего
+# времени, чтобы одно зерно давало одни и те же данные при любом запуске.
+REFERENCE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def zipf_rank(rng, size, exponent):
+    """Случайный ранг от 1 до size по закону Ципфа.
+
+    Обратная функция непрерывного степенного распределения: не требует
+    таблицы весов, поэтому годится для миллионов элементов.
+    """
+    u = rng.random()
+    if exponent == 1:
+        rank = size ** u
+    else:
+        power = 1 - exponent
+        rank = ((size ** power - 1) * u + 1) ** (1 / power)
+    return min(size, int(rank))
+
+
+def zipf_counts(total, size, exponent, limit):
+    """Делит total между size элементами по закону Ципфа.
+
+    Первый элемент самый популярный. Ни один элемент не получает больше
+    limit, остаток раздается по порядку тем, у кого есть место.
+    """
+    if not total or not size:
+        return [0] * size
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(limit, int(weight * scale)) for weight in weights]
+    left = total - sum(counts)
+    while left:
+        for index in range(size):
+            if left and counts[index] < limit:
+                counts[index] += 1
+                left -= 1
+    return counts
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+class Generator:
+    """Пишет синтетические данные пачками через executemany.
+
+    Строки собираются кортежами без создания объектов моделей, поля,
+    которых нет в кортеже, получают значения по умолчанию. id задаются
+    заранее (после текущего максимума), поэтому связи строятся без
+    чтения из базы, а данные дописываются к существующим.
+    """
+
+    period = timedelta(days=5 * 365)
+
+    def __init__(self, counts, seed=0, exponent=1.1, max_genres=3,
+                 batch_size=5000, progress=None, now=REFERENCE_TIME):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.exponent = exponent
+        self.max_genres = min(max_genres, counts['genres'])
+        self.batch_size = batch_size
+        self.progress = progress
+        self.start = {}
+        self.now = now
+        self.review_ages = array('d')
+
+    def insert_sql(self, model, columns):
+        """INSERT по колонкам columns и константы для остальных полей."""
+        defaults = []
+        names = []
+        for field in model._meta.concrete_fields:
+            if field.attname in columns:
+                continue
+            if field.primary_key:
+                continue
+            names.append(field.column)
+            defaults.append(field.get_db_prep_save(
+                field.get_default(), connection))
+        names = [model._meta.get_field(name).column
+                 for name in columns] + names
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(name) for name in names),
+            ', '.join(['%s'] * len(names)),
+        )
+        return sql, tuple(defaults)
+
+    def bulk_insert(self, model, columns, rows):
+        sql, defaults = self.insert_sql(model, columns)
+        count = 0
+        started = time.monotonic()
+        while True:
+            batch = [row + defaults
+                     for row in islice(rows, self.batch_size)]
+            if not batch:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            count += len(batch)
+            if self.progress is not None:
+                self.progress(model, count, time.monotonic() - started)
+        return count
+
+    def date(self, age):
+        """Дата публикации age секунд назад в формате базы."""
+        return connection.ops.adapt_datetimefield_value(
+            self.now - timedelta(seconds=age))
+
+    def categories(self):
+        first = self.start[Category]
+        for id in range(first, first + self.counts['categories']):
+            yield id, f'Категория {id}', f'category-{id}'
+
+    def genres(self):
+        first = self.start[Genre]
+        for id in range(first, first + self.counts['genres']):
+            yield id, f'Жанр {id}', f'genre-{id}'
+
+    def users(self):
+        first = self.start[User]
+        for id in range(first, first + self.counts['users']):
+            yield id, f'fake_user{id}', f'fake_user{id}@yamdb.fake'
+
+    def titles(self):
+        first = self.start[Title]
+        for id in range(first, first + self.counts['titles']):
+            yield (
+                id,
+                f'Произведение {id}',
+                self.rng.randint(1900, 2020),
+                f'Описание произведения номер {id}',
+                self.start[Category] + zipf_rank(
+                    self.rng, self.counts['categories'], self.exponent) - 1,
+            )
+
+    def genre_titles(self):
+        """У произведения от одного до max_genres жанров."""
+        genres = range(self.start[Genre],
+                       self.start[Genre] + self.counts['genres'])
+        sizes = range(1, self.max_genres + 1)
+        weights = [1 / size ** 2 for size in sizes]
+        first = self.start[Title]
+        for title_id in range(first, first + self.counts['titles']):
+            size = self.rng.choices(sizes, weights)[0]
+            for genre_id in self.rng.sample(genres, size):
+                yield title_id, genre_id
+
+    def reviews(self):
+        """Число отзывов на произведение распределено по Ципфу.
+
+        Авторы отзывов на одно произведение идут подряд по кругу от
+        случайного пользователя, поэтому пара автор-произведение
+        уникальна без проверок.
+        """
+        if not self.counts['reviews']:
+            return
+        users = self.counts['users']
+        period = self.period.total_seconds()
+        id = self.start[Review]
+        per_title = zipf_counts(
+            self.counts['reviews'], self.counts['titles'], self.exponent,
+            users)
+        for offset, count in enumerate(per_title):
+            mean = self.rng.uniform(3, 9)
+            first_author = self.rng.randrange(users)
+            for step in range(count):
+                score = round(self.rng.gauss(mean, 2))
+                age = self.rng.uniform(0, period)
+                self.review_ages.append(age)
+                yield (
+                    id,
+                    self.start[Title] + offset,
+                    self.start[User] + (first_author + step) % users,
+                    f'Отзыв {id}',
+                    min(10, max(1, score)),
+                    self.date(age),
+                )
+                id += 1
+
+    def comments(self):
+        """Длинный хвост: большая часть комментариев у немногих отзывов.
+
+        Комментарий всегда моложе своего отзыва.
+        """
+        reviews = self.counts['reviews']
+        first = self.start[Comment]
+        for id in range(first, first + self.counts['comments']):
+            rank = zipf_rank(self.rng, reviews, self.exponent)
+            yield (
+                id,
+                self.start[Review] + rank - 1,
+                self.start[User] + self.rng.randrange(self.counts['users']),
+                f'Комментарий {id}',
+                self.date(self.rng.uniform(0, self.review_ages[rank - 1])),
+            )
+
+    def validate(self):
+        """Проверяет объемы до первой вставки: пачки коммитятся сразу."""
+        counts = self.counts
+        if counts['reviews'] > counts['titles'] * counts['users']:
+            raise ValueError(
+                'Отзывов больше, чем пар произведение-автор')
+        for parent, child in (('categories', 'titles'),
+                              ('genres', 'titles'),
+                              ('titles', 'reviews'),
+                              ('users', 'reviews'),
+                              ('reviews', 'comments'),
+                              ('users', 'comments')):
+            if counts[child] and not counts[parent]:
+                raise ValueError(f'Для {child} нужен хотя бы один {parent}')
+
+    def run(self):
+        self.validate()
+        steps = (
+            (Category, ('id', 'name', 'slug'), self.categories),
+            (Genre, ('id', 'name', 'slug'), self.genres),
+            (User, ('id', 'username', 'email'), self.users),
+            (Title, ('id', 'name', 'year', 'description', 'category_id'),
+             self.titles),
+            (GenreTitle, ('title_id', 'genre_id'), self.genre_titles),
+            (Review, ('id', 'title_id', 'author_id', 'text', 'score',
+                      'pub_date'), self.reviews),
+            (Comment, ('id', 'review_id', 'author_id', 'text', 'pub_date'),
+             self.comments),
+        )
+        for model, _, _ in steps:
+            self.start[model] = next_id(model)
+        written = {model: self.bulk_insert(model, columns, rows())
+                   for model, columns, rows in steps}
+
+        models = [model for model, _, _ in steps]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        refresh_denormalized(models)
+        return written
+
+
+def generate(counts, seed=0, **options):
+    """Заполняет базу синтетическими данными в объемах counts."""
+    return Generator(dict(DEFAULT_COUNTS, **counts), seed, **options).run()
+
+
+def parse_now(value):
+    """Дата и время из --now; без часового пояса считается UTC."""
+    try:
+        now = parse_datetime(value)
+    except ValueError:
+        now = None
+    if now is None:
+        raise CommandError('--now ожидает дату и время в ISO 8601')
+    if timezone.is_naive(now):
+        now = timezone.make_aware(now, timezone.utc)
+    return now
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_COUNTS.items():
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                default=default,
+                help=f'Количество: {name}. По умолчанию {default}.',
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одно зерно - одни и те же данные.',
+        )
+        parser.add_argument(
+            '--now',
+            default=REFERENCE_TIME.isoformat(),
+            help='Момент, от которого отсчитываются даты публикации, '
+                 f'в ISO 8601. По умолчанию {REFERENCE_TIME.isoformat()}.',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности.',
+        )
+        parser.add_argument(
+            '--max-genres',
+            type=int,
+            default=3,
+            help='Наибольшее число жанров у произведения.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк в одной вставке.',
+        )
+
+    def handle(self, *args, **options):
+        counts = {name: options[name] for name in DEFAULT_COUNTS}
+        if min(counts.values()) < 0:
+            raise CommandError('Количество не может быть отрицательным')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if options['zipf'] <= 0 or options['max_genres'] < 1:
+            raise CommandError(
+                '--zipf и --max-genres должны быть больше нуля')
+        now = parse_now(options['now'])
+
+        def progress(model, count, elapsed):
+            self.stdout.write(
+                f'{model._meta.db_table}: {count} строк, '
+                f'{count / max(elapsed, 1e-9):.0f} строк/с',
+                ending='\r')
+            self.stdout.flush()
+
+        started = time.monotonic()
+        try:
+            written = generate(
+                counts,
+                options['seed'],
+                exponent=options['zipf'],
+                max_genres=options['max_genres'],
+                batch_size=options['batch_size'],
+                progress=progress,
+                now=now,
+            )
+        except ValueError as e:
+            raise CommandError(e) from e
+        elapsed = time.monotonic() - started
+        for model, count in written.items():
+            self.stdout.write(f'{model._meta.db_table}: {count} строк')
+        total = sum(written.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с)'))
@@ -1,8 +1,16 @@
-import os
 import csv
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
 
+import django
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import SET_NULL
+from django.db.utils import IntegrityError
 
 from reviews.models import (
     Category,
@@ -12,41 +20,380 @@ from reviews.models import (
     Review,
     Comment
 )
+from reviews.services import refresh_denormalized
 from users.models import User
 
+NAME_MODELS = {
+    'category': Category,
+    'genre': Genre,
+    'titles': Title,
+    'users': User,
+    'review': Review,
+    'comments': Comment,
+    'genre_title': GenreTitle,
+}
+
+
+def build_dependencies(names):
+    """Строит граф зависимостей файлов по внешним ключам моделей.
+
+    Возвращает словарь: имя файла -> множество имен файлов, которые
+    должны быть загружены раньше него.
+    """
+    model_names = {NAME_MODELS[name]: name for name in names}
+    return {
+        name: {
+            model_names[field.related_model]
+            for field in NAME_MODELS[name]._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in model_names
+            and field.related_model is not NAME_MODELS[name]
+        }
+        for name in names
+    }
+
+
+def topological_order(dependencies):
+    """Упорядочивает файлы так, чтобы родители шли раньше детей."""
+    order = []
+    pending = dict(dependencies)
+    while pending:
+        ready = [name for name, parents in pending.items()
+                 if not parents - set(order)]
+        if not ready:
+            raise CommandError(
+                f'Циклическая зависимость: {", ".join(pending)}')
+        for name in ready:
+            order.append(name)
+            del pending[name]
+    return order
+
+
+def read_rows(path, model):
+    """Читает CSV и приводит значения к типам полей модели.
+
+    Возвращает поля из заголовка и итератор объектов. Колонки внешних
+    ключей пишутся сразу в attname (например author_id), поэтому
+    связанные объекты из базы не запрашиваются.
+    """
+    data = open(path, encoding='utf-8', newline='')
+    reader = csv.reader(data)
+    try:
+        fields = [model._meta.get_field(column) for column in next(reader)]
+    except BaseException:
+        data.close()
+        raise
+
+    def rows():
+        with data:
+            for line in reader:
+                row = {}
+                for field, value in zip(fields, line):
+                    if value == '' and field.null:
+                        row[field.attname] = None
+                    else:
+                        row[field.attname] = field.to_python(value)
+                yield model(**row)
+
+    return fields, rows()
+
+
+def insert_objects(model, objs, fields):
+    """INSERT объектов, который сохраняет значения колонок из файла.
+
+    bulk_create вызывает pre_save, и auto_now_add (например pub_date)
+    получает время загрузки вместо даты из дампа. Здесь pre_save
+    вызывается только для полей, которых нет в заголовке.
+    """
+    given = {field.attname for field in fields}
+    columns = [field for field in model._meta.concrete_fields
+               if not (field.primary_key and field.attname not in given)]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    rows = [
+        [field.get_db_prep_save(
+            getattr(obj, field.attname) if field.attname in given
+            else field.pre_save(obj, True), connection)
+         for field in columns]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def create_objects(model, objs, fields):
+    if any(getattr(field, 'auto_now_add', False) for field in fields):
+        insert_objects(model, objs, fields)
+    else:
+        model.objects.bulk_create(objs)
+
+
+def write_batch(model, batch, upsert, fields=()):
+    """Записывает пачку объектов одной транзакцией.
+
+    При upsert у существующих строк обновляются только поля fields -
+    колонки из заголовка файла, остальные поля не трогаются. Даты
+    auto_now_add из файла сохраняются как есть.
+    """
+    with transaction.atomic():
+        if not upsert:
+            create_objects(model, batch, fields)
+            return
+        existing = set(model.objects.filter(
+            pk__in=[obj.pk for obj in batch]).values_list('pk', flat=True))
+        new = [obj for obj in batch if obj.pk not in existing]
+        if new:
+            create_objects(model, new, fields)
+        update_fields = [
+            field.name for field in fields if not field.primary_key]
+        if update_fields:
+            model.objects.bulk_update(
+                [obj for obj in batch if obj.pk in existing],
+                update_fields)
+
+
+def import_file(model, path, batch_size, upsert=False, progress=None):
+    """Импортирует файл пачками и возвращает число записанных строк."""
+    fields, rows = read_rows(path, model)
+    count = 0
+    started = time.monotonic()
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        write_batch(model, batch, upsert, fields)
+        count += len(batch)
+        if progress is not None:
+            progress(count, time.monotonic() - started)
+    reset_sequences(model)
+    return count
+
+
+def reset_sequences(model):
+    """Сдвигает последовательность id после вставки явных ключей."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def reverse_foreign_keys(model):
+    """Внешние ключи других моделей, которые ссылаются на model."""
+    return [
+        relation.field
+        for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete
+        and (relation.one_to_many or relation.one_to_one)
+        and relation.related_model is not model
+    ]
+
+
+def truncate_plan(models):
+    """План очистки таблиц моделей вместе с зависимыми.
+
+    Возвращает модели для удаления, начиная с зависимых (например
+    reviews_titlestats раньше reviews_title), и поля с on_delete
+    SET_NULL, которые нужно обнулить, - как при удалении через ORM.
+    """
+    found = {}
+    nullify = []
+    pending = list(models)
+    while pending:
+        model = pending.pop()
+        if model in found:
+            continue
+        fields = reverse_foreign_keys(model)
+        found[model] = {field.model for field in fields}
+        for field in fields:
+            if field.remote_field.on_delete is SET_NULL:
+                nullify.append(field)
+            else:
+                pending.append(field.model)
+    order = []
+    while found:
+        ready = [model for model, children in found.items()
+                 if not children & found.keys()]
+        for model in ready:
+            order.append(model)
+            del found[model]
+    nullify = [field for field in nullify if field.model not in order]
+    return order, nullify
+
+
+def truncate(models):
+    """Очищает таблицы моделей и зависимых от них, начиная с зависимых.
+
+    Возвращает все затронутые модели: по ним пересобираются
+    денормализованные данные.
+    """
+    order, nullify = truncate_plan(models)
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        for field in nullify:
+            cursor.execute('UPDATE {} SET {} = NULL'.format(
+                quote(field.model._meta.db_table), quote(field.column)))
+        for model in order:
+            cursor.execute(f'DELETE FROM {quote(model._meta.db_table)}')
+    return order + [field.model for field in nullify]
+
+
+def init_worker():
+    """Готовит процесс пула: свои соединения с базой для каждого воркера."""
+    django.setup()
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout = 60000')
+
+
+def import_in_worker(name, path, batch_size, upsert):
+    """Импортирует один файл в процессе пула."""
+    started = time.monotonic()
+    try:
+        count = import_file(NAME_MODELS[name], path, batch_size, upsert)
+    finally:
+        connections.close_all()
+    return name, count, time.monotonic() - started
+
 
 class Command(BaseCommand):
     help = 'Импорт данных из файлов CSV.'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='*',
+            metavar='file',
+            help=('Имена файлов без расширения: '
+                  f'{", ".join(NAME_MODELS)}. По умолчанию все.'),
+        )
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Папка с файлами CSV.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк в одной вставке и транзакции.',
+        )
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help=('Очистить таблицы выбранных файлов и ссылающиеся на них '
+                  'перед импортом.'),
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Обновлять строки с существующим id вместо ошибки.',
+        )
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=1,
+            metavar='N',
+            help=('Число процессов. Независимые файлы грузятся '
+                  'одновременно, зависимые - сразу после родителей.'),
+        )
 
-        name_models = {
-            'category': Category,
-            'genre': Genre,
-            'titles': Title,
-            'users': User,
-            'review': Review,
-            'comments': Comment,
-            'genre_title': GenreTitle,
-        }
+    def get_selected(self, files):
+        unknown = set(files) - set(NAME_MODELS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные файлы: {", ".join(sorted(unknown))}')
+        return [name for name in NAME_MODELS if not files or name in files]
+
+    def handle(self, *args, **options):
+        dependencies = build_dependencies(
+            self.get_selected(options['files']))
+        names = topological_order(dependencies)
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        models = [NAME_MODELS[name] for name in names]
+        changed = list(models)
+
+        try:
+            if options['truncate']:
+                changed += truncate(models)
+            if options['parallel'] > 1:
+                self.import_parallel(dependencies, options)
+            else:
+                for name in names:
+                    self.import_one(name, options)
+        except IntegrityError as e:
+            raise CommandError(f'Ошибка целостности данных: {e}') from e
+
+        refresh_denormalized(changed)
+
+    def import_one(self, name, options):
+        def progress(count, elapsed):
+            self.stdout.write(
+                f'{name}: {count} строк, {count / elapsed:.0f} строк/с',
+                ending='\r')
+            self.stdout.flush()
+
+        started = time.monotonic()
+        count = import_file(
+            NAME_MODELS[name],
+            os.path.join(options['data_dir'], f'{name}.csv'),
+            options['batch_size'],
+            upsert=options['upsert'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: {count} строк за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-9):.0f} строк/с)'))
+
+    def prepare_parallel(self):
+        """Проверяет базу и закрывает соединения перед запуском пула."""
+        if connection.vendor == 'sqlite':
+            if connection.is_in_memory_db():
+                raise CommandError(
+                    'Параллельный импорт невозможен для SQLite в памяти')
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode = WAL')
+        elif connection.vendor != 'postgresql':
+            raise CommandError(
+                'Параллельный импорт поддерживается для PostgreSQL '
+                'и SQLite в режиме WAL')
+        connections.close_all()
+
+    def import_parallel(self, dependencies, options):
+        self.prepare_parallel()
+        pending = dict(dependencies)
+        done = set()
+        running = {}
 
-        for name, model in name_models.items():
-            with open(
-                os.path.join(
-                    settings.BASE_DIR,
-                    'static',
-                    'data',
-                    f'{name}.csv'
-                ),
-                encoding='utf-8'
-            ) as data:
-                for line in csv.DictReader(data):
-                    i = {}
-                    for key, value in line.items():
-                        if key == 'category':
-                            i[key] = name_models[key].objects.get(id=value)
-                        elif key == 'author':
-                            i[key] = User.objects.get(id=value)
-                        else:
-                            i[key] = value
-                    model.objects.create(**i)
+        with ProcessPoolExecutor(max_workers=options['parallel'],
+                                 initializer=init_worker) as pool:
+            while pending or running:
+                ready = [name for name, parents in pending.items()
+                         if parents <= done]
+                for name in ready:
+                    del pending[name]
+                    running[pool.submit(
+                        import_in_worker,
+                        name,
+                        os.path.join(options['data_dir'], f'{name}.csv'),
+                        options['batch_size'],
+                        options['upsert'],
+                    )] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+                    try:
+                        name, count, elapsed = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    done.add(name)
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{name}: {count} строк за {elapsed:.1f} с '
+                        f'({count / max(elapsed, 1e-9):.0f} строк/с)'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from reviews.services import rebuild_title_ratings, rebuild_title_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчет рейтингов и статистики отзывов произведений.'
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_title_ratings()
+        rebuild_title_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано произведений: {updated}'))
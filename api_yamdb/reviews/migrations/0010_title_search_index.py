@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from reviews.search import create_index, drop_index
+
+
+def forwards(apps, schema_editor):
+    create_index(schema_editor.connection)
+
+
+def backwards(apps, schema_editor):
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# PostgreSQL по умолчанию считает NULL больше любых значений. Сортировка
+# по рейтингу ставит произведения без отзывов в конец (ASC NULLS FIRST и
+# обратный ему DESC NULLS LAST), и эти индексы отдают такой порядок без
+# сортировки. В SQLite NULL и так меньше всех, там хватает индексов 0013.
+INDEXES = {
+    'title_rating_nulls_idx': '(rating ASC NULLS FIRST, id)',
+    'title_category_rating_nulls_idx':
+        '(category_id, rating ASC NULLS FIRST, id)',
+}
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, columns in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON reviews_title {columns}')
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
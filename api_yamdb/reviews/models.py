@@ -2,7 +2,7 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
@@ -94,10 +94,39 @@ class Title(models.Model):
         Genre,
         through='GenreTitle',
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0,
+    )
+    rating = models.FloatField(
+        'Рейтинг произведения',
+        blank=True,
+        null=True,
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['category', 'year'],
+                         name='title_category_year_idx'),
+            models.Index(fields=['rating', 'id'],
+                         name='title_rating_idx'),
+            models.Index(fields=['rating_count', 'id'],
+                         name='title_rating_count_idx'),
+            models.Index(fields=['year', 'id'],
+                         name='title_year_idx'),
+            models.Index(fields=['name', 'id'],
+                         name='title_name_idx'),
+            models.Index(fields=['category', 'rating', 'id'],
+                         name='title_category_rating_idx'),
+            models.Index(fields=['category', 'rating_count', 'id'],
+                         name='title_category_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -119,6 +148,10 @@ class GenreTitle(models.Model):
     class Meta:
         verbose_name = 'Жанр произведения'
         verbose_name_plural = 'Жанры произведений'
+        indexes = [
+            models.Index(fields=['genre', 'title'],
+                         name='genretitle_genre_title_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} {self.genre}'
@@ -168,6 +201,23 @@ class Review(models.Model):
     def __str__(self):
         return f'{self.title} {self.author} {self.score}'
 
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и изменение рейтинга в одной транзакции.
+
+        Прежние произведение и оценка для сигнала apply_review_score
+        читаются из БД под блокировкой строки, а не из снимка при
+        загрузке: иначе два параллельных изменения одного отзыва посчитают
+        разницу от одной и той же старой оценки.
+        """
+        with transaction.atomic(using=kwargs.get('using')):
+            if not self._state.adding and self.pk is not None:
+                stored = (Review.objects.select_for_update()
+                          .filter(pk=self.pk)
+                          .values_list('title_id', 'score').first())
+                if stored is not None:
+                    self._rated = stored
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -177,6 +227,10 @@ class Review(models.Model):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -208,6 +262,106 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.review} {self.author} {self.text}'
+
+
+class TitleStats(models.Model):
+    """Статистика отзывов на произведение.
+
+    Гистограмма оценок, количество и дата последнего отзыва обновляются
+    сигналами при каждой записи отзыва, поэтому чтение - одна строка
+    по первичному ключу.
+    """
+
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Произведение',
+    )
+    score_1 = models.PositiveIntegerField('Оценок 1', default=0)
+    score_2 = models.PositiveIntegerField('Оценок 2', default=0)
+    score_3 = models.PositiveIntegerField('Оценок 3', default=0)
+    score_4 = models.PositiveIntegerField('Оценок 4', default=0)
+    score_5 = models.PositiveIntegerField('Оценок 5', default=0)
+    score_6 = models.PositiveIntegerField('Оценок 6', default=0)
+    score_7 = models.PositiveIntegerField('Оценок 7', default=0)
+    score_8 = models.PositiveIntegerField('Оценок 8', default=0)
+    score_9 = models.PositiveIntegerField('Оценок 9', default=0)
+    score_10 = models.PositiveIntegerField('Оценок 10', default=0)
+    count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+    )
+    last_review_date = models.DateTimeField(
+        'Дата последнего отзыва',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика произведения'
+        verbose_name_plural = 'Статистика произведений'
+
+    def __str__(self):
+        return f'{self.title_id} {self.count}'
+
+    @staticmethod
+    def score_field(score):
+        return f'score_{int(score)}'
+
+    @property
+    def histogram(self):
+        return {str(score): getattr(self, self.score_field(score))
+                for score in self.SCORES}
+
+
+class ChangeLog(models.Model):
+    """Журнал изменений произведений, отзывов и комментариев.
+
+    Только дописывается: сигналы и массовая запись добавляют строку на
+    каждое создание, изменение и удаление, а id служит курсором ленты
+    /api/v1/changes/. Строка пишется в той же транзакции, что и само
+    изменение, поэтому откат убирает и ее. Старые и перекрытые более
+    поздними строки удаляет команда compact_changes.
+    """
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = (
+        (CREATE, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+    )
+    MODELS = (
+        ('title', 'Произведение'),
+        ('review', 'Отзыв'),
+        ('comment', 'Комментарий'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField('Модель', max_length=16, choices=MODELS)
+    object_id = models.PositiveIntegerField('Id объекта')
+    action = models.CharField('Действие', max_length=16, choices=ACTIONS)
+    changed_at = models.DateTimeField('Время изменения', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [
+            models.Index(fields=['model', 'object_id', 'id'],
+                         name='changelog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.pk} {self.action} {self.model} {self.object_id}'
@@ -0,0 +1,121 @@
+"""Полнотекстовый поиск по названию и описанию произведений.
+
+На SQLite используется виртуальная таблица FTS5, которая
+синхронизируется сигналами модели Title. На PostgreSQL - GIN индекс по
+выражению tsvector, который база поддерживает сама.
+"""
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+PG_INDEX = 'reviews_title_search_idx'
+PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce({table}name, '') || ' ' "
+    "|| coalesce({table}description, ''))"
+)
+PG_QUERY = "plainto_tsquery('simple', %s)"
+
+
+def create_index(connection):
+    """Создает поисковый индекс и наполняет его текущими данными."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                "USING fts5(name, description, tokenize = 'unicode61')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON reviews_title '
+                f'USING GIN ({PG_DOCUMENT.format(table="")})')
+    rebuild_index(connection)
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+def rebuild_index(connection=None):
+    """Полностью пересобирает поисковый индекс."""
+    connection = connection or connections['default']
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                'SELECT id, name, description FROM reviews_title')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'REINDEX INDEX {PG_INDEX}')
+
+
+def index_title(title):
+    """Обновляет запись произведения в индексе SQLite."""
+    index_titles([title], title._state.db)
+
+
+def index_titles(titles, using=None):
+    """Обновляет записи нескольких произведений в индексе SQLite.
+
+    Нужна после bulk_create и bulk_update, которые не вызывают сигналы.
+    """
+    connection = connections[using or 'default']
+    if connection.vendor != 'sqlite' or not titles:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(title.pk,) for title in titles])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [(title.pk, title.name, title.description) for title in titles])
+
+
+def unindex_title(title):
+    """Удаляет произведение из индекса SQLite."""
+    connection = connections[title._state.db or 'default']
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+
+
+def search_titles(queryset, query):
+    """Фильтрует произведения по запросу и сортирует по релевантности."""
+    terms = query.split()
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+
+    if vendor == 'sqlite':
+        match = ' '.join(
+            '"{}"*'.format(term.replace('"', '""')) for term in terms)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id',
+                   f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+            order_by=['search_rank'],
+        )
+
+    if vendor == 'postgresql':
+        document = PG_DOCUMENT.format(table=f'{table}.')
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f'ts_rank({document}, {PG_QUERY})', (query,)),
+        ).extra(
+            where=[f'{document} @@ {PG_QUERY}'],
+            params=[query],
+        ).order_by('-search_rank')
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition)
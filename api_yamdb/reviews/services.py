@@ -0,0 +1,177 @@
+from django.db import transaction
+from django.db.models import (Avg, Case, Count, DateTimeField, Exists,
+                              ExpressionWrapper, F, FloatField, Max,
+                              OuterRef, Q, Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.dispatch import Signal
+
+from .models import ChangeLog, Review, Title, TitleStats
+from .search import rebuild_index
+
+# Массовая запись в обход сигналов моделей (import_csv,
+# generate_fake_data) закоммичена; models - затронутые модели.
+bulk_written = Signal(providing_args=['models'])
+
+
+def log_changes(model, pks, action):
+    """Записывает в журнал изменение объектов model с ключами pks."""
+    ChangeLog.objects.bulk_create([
+        ChangeLog(model=model._meta.model_name, object_id=pk, action=action)
+        for pk in pks])
+
+
+def delete_in_batches(queryset, batch_size):
+    """Удаляет строки queryset пачками по первичному ключу."""
+    deleted = 0
+    last = None
+    while True:
+        rows = queryset.order_by('pk')
+        if last is not None:
+            rows = rows.filter(pk__gt=last)
+        pks = list(rows.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks).delete()[0]
+        last = pks[-1]
+
+
+def compact_change_log(keep_since=None, batch_size=10000):
+    """Сжимает журнал изменений и возвращает (устаревших, перекрытых).
+
+    Строки старше keep_since удаляются целиком, из остальных удаляются
+    те, у объекта которых есть более поздняя строка. Последняя строка
+    объекта всегда остается с прежним курсором, так что клиент с любым
+    курсором не пропускает итоговое состояние.
+    """
+    expired = 0
+    if keep_since is not None:
+        first_kept = (ChangeLog.objects.filter(changed_at__gte=keep_since)
+                      .order_by('pk').values_list('pk', flat=True).first())
+        rows = ChangeLog.objects.all()
+        if first_kept is not None:
+            rows = rows.filter(pk__lt=first_kept)
+        expired = delete_in_batches(rows, batch_size)
+    newer = ChangeLog.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'),
+        pk__gt=OuterRef('pk'))
+    superseded = delete_in_batches(
+        ChangeLog.objects.annotate(superseded=Exists(newer))
+        .filter(superseded=True),
+        batch_size)
+    return expired, superseded
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """Атомарно применяет изменение оценок к рейтингу произведения.
+
+    Сумма, количество и производный рейтинг пересчитываются одним
+    UPDATE по первичному ключу, без чтения отзывов.
+    """
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=Case(
+            When(rating_count=-count_delta, then=Value(None)),
+            default=ExpressionWrapper(
+                Cast(new_sum, FloatField()) / new_count,
+                output_field=FloatField()),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def rebuild_title_ratings():
+    """Пересчитывает рейтинги всех произведений по таблице отзывов."""
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    return Title.objects.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0),
+        rating=Subquery(
+            reviews.annotate(total=Avg('score')).values('total'),
+            output_field=FloatField()),
+    )
+
+
+def update_title_stats(title_id, added=None, removed=None, pub_date=None):
+    """Атомарно сдвигает статистику отзывов произведения.
+
+    added и removed - появившаяся и исчезнувшая оценки, pub_date - дата
+    добавленного отзыва. Все поля меняются одним UPDATE через F();
+    после удаления отзыва дата последнего отзыва берется подзапросом
+    по индексу (title, pub_date). Если строки статистики еще нет, при
+    добавлении оценки она собирается по отзывам целиком; при удалении
+    (в том числе каскадном вместе с произведением) пропускается.
+    """
+    changes = {}
+    if added is not None:
+        field = TitleStats.score_field(added)
+        changes[field] = F(field) + 1
+    if removed is not None:
+        field = TitleStats.score_field(removed)
+        changes[field] = changes.get(field, F(field)) - 1
+    count_delta = (added is not None) - (removed is not None)
+    if count_delta:
+        changes['count'] = F('count') + count_delta
+    if pub_date is not None:
+        changes['last_review_date'] = Case(
+            When(Q(last_review_date__isnull=True)
+                 | Q(last_review_date__lt=pub_date), then=Value(pub_date)),
+            default=F('last_review_date'),
+            output_field=DateTimeField(),
+        )
+    elif removed is not None:
+        changes['last_review_date'] = Subquery(
+            Review.objects.filter(title_id=title_id)
+            .order_by('-pub_date').values('pub_date')[:1])
+    if not changes:
+        return
+    updated = TitleStats.objects.filter(pk=title_id).update(**changes)
+    if not updated and added is not None:
+        rebuild_title_stats([title_id])
+
+
+def rebuild_title_stats(title_ids=None):
+    """Пересобирает статистику отзывов произведений по таблице отзывов.
+
+    Без title_ids пересчитываются все произведения.
+    """
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    aggregates = {TitleStats.score_field(score):
+                  Count('pk', filter=Q(score=score))
+                  for score in TitleStats.SCORES}
+    rows = (Review.objects.filter(title__in=titles).order_by()
+            .values('title')
+            .annotate(count=Count('pk'), last_review_date=Max('pub_date'),
+                      **aggregates))
+    stats = {row.pop('title'): row for row in rows}
+    with transaction.atomic():
+        TitleStats.objects.filter(title__in=titles).delete()
+        TitleStats.objects.bulk_create(
+            (TitleStats(title_id=pk, **stats.get(pk, {}))
+             for pk in titles.values_list('pk', flat=True).iterator()))
+
+
+def refresh_denormalized(models):
+    """Пересчитывает денормализованные данные после массовой записи.
+
+    bulk_create и прямые DELETE не вызывают сигналы моделей, поэтому
+    после них производные поля нужно пересобрать явно, а кэши API
+    сбросить сигналом bulk_written.
+    """
+    models = set(models)
+    if models & {Title, Review}:
+        rebuild_title_ratings()
+        rebuild_title_stats()
+    if Title in models:
+        rebuild_index()
+    transaction.on_commit(
+        lambda: bulk_written.send(sender=None, models=models))
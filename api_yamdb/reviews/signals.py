@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import ChangeLog, Comment, Review, Title, TitleStats
+from .search import index_title, unindex_title
+from .services import log_changes, update_title_rating, update_title_stats
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """Запоминает исходные оценку и произведение отзыва."""
+    instance._rated = (instance.__dict__.get('title_id'),
+                       instance.__dict__.get('score'))
+
+
+@receiver(post_save, sender=Review)
+def apply_review_score(sender, instance, created, **kwargs):
+    """Учитывает новую или измененную оценку в рейтинге и статистике."""
+    title_id, score = instance.title_id, int(instance.score)
+    old_title_id, old_score = instance._rated
+    if created:
+        update_title_rating(title_id, score, 1)
+        update_title_stats(title_id, added=score, pub_date=instance.pub_date)
+    elif old_title_id != title_id:
+        update_title_rating(old_title_id, -int(old_score), -1)
+        update_title_stats(old_title_id, removed=old_score)
+        update_title_rating(title_id, score, 1)
+        update_title_stats(title_id, added=score, pub_date=instance.pub_date)
+    elif old_score is not None and score != int(old_score):
+        update_title_rating(title_id, score - int(old_score), 0)
+        update_title_stats(title_id, added=score, removed=old_score)
+    instance._rated = (title_id, score)
+
+
+@receiver(post_delete, sender=Review)
+def revoke_review_score(sender, instance, **kwargs):
+    """Убирает оценку удаленного отзыва из рейтинга и статистики."""
+    update_title_rating(instance.title_id, -int(instance.score), -1)
+    update_title_stats(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Title)
+def create_title_stats(sender, instance, created, **kwargs):
+    """Создает пустую статистику для нового произведения."""
+    if created:
+        TitleStats.objects.create(title=instance)
+
+
+@receiver(post_save, sender=Title)
+def update_search_index(sender, instance, **kwargs):
+    """Обновляет поисковый индекс при сохранении произведения."""
+    index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Удаляет произведение из поискового индекса."""
+    unindex_title(instance)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def log_saved(sender, instance, created, **kwargs):
+    """Записывает создание или изменение в журнал."""
+    action = ChangeLog.CREATE if created else ChangeLog.UPDATE
+    log_changes(sender, [instance.pk], action)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def log_deleted(sender, instance, **kwargs):
+    """Записывает удаление в журнал."""
+    log_changes(sender, [instance.pk], ChangeLog.DELETE)
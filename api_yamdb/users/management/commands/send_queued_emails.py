@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import BatchSender, get_stats
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help=('Максимум писем на одно соединение с сервером '
+                  '(по умолчанию EMAIL_BATCH_MAX_SIZE).'),
+        )
+        parser.add_argument(
+            '--max-wait',
+            type=float,
+            default=None,
+            help=('Сколько секунд письмо может ждать накопления пачки '
+                  '(по умолчанию EMAIL_BATCH_MAX_WAIT).'),
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, опрашивая очередь.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Пауза в секундах между опросами очереди.',
+        )
+
+    def handle(self, *args, **options):
+        sender = BatchSender(options['batch_size'], options['max_wait'])
+        if not options['loop']:
+            sent = sender.drain()
+            self.stdout.write(f'Отправлено писем: {sent}')
+            self.write_stats()
+            return
+
+        while True:
+            sent = sender.run_once()
+            if sent is None:
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f'Отправлено писем: {sent}')
+            self.write_stats()
+
+    def write_stats(self):
+        self.stdout.write(', '.join(
+            f'{name}={value:.3f}' if isinstance(value, float)
+            else f'{name}={value}'
+            for name, value in sorted(get_stats().items())))
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -39,3 +40,54 @@ class User(AbstractUser):
     @property
     def is_user(self):
         return self.role == User.USER
+
+
+class QueuedEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField(
+        'Тема',
+        max_length=255,
+    )
+    body = models.TextField(
+        'Текст',
+    )
+    from_email = models.CharField(
+        'Отправитель',
+        max_length=254,
+    )
+    recipients = models.TextField(
+        'Получатели через запятую',
+    )
+    created = models.DateTimeField(
+        'Дата постановки в очередь',
+        auto_now_add=True,
+    )
+    next_attempt_at = models.DateTimeField(
+        'Время следующей попытки',
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Количество попыток',
+        default=0,
+    )
+    sent_at = models.DateTimeField(
+        'Дата отправки',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(
+        'Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['sent_at', 'next_attempt_at'],
+                         name='users_email_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipients} {self.subject}'
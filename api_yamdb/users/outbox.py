@@ -0,0 +1,200 @@
+"""Очередь исходящих писем в базе данных.
+
+Письма сохраняются в QueuedEmail и отправляются воркером
+send_queued_emails пачками через одно соединение с почтовым сервером.
+При EMAIL_OUTBOX_EAGER письмо отправляется сразу после постановки в
+очередь. Если настройка не задана, сразу отправляются только письма
+локальных бэкендов (файлы, память, консоль) - так работают локальная
+разработка и тесты, а отправка через SMTP всегда идет воркером.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+stats = Counter()
+
+LOCAL_BACKENDS = (
+    'django.core.mail.backends.filebased.EmailBackend',
+    'django.core.mail.backends.locmem.EmailBackend',
+    'django.core.mail.backends.console.EmailBackend',
+)
+
+
+def pending_emails():
+    """Письма, которые ждут отправки и еще не исчерпали попытки."""
+    return QueuedEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+
+
+def get_stats():
+    """Счетчики отправки и текущая глубина очереди."""
+    result = dict(stats)
+    result['queue_depth'] = pending_emails().count()
+    if stats['batches']:
+        result['avg_batch_send_seconds'] = (
+            stats['send_seconds'] / stats['batches'])
+    if stats['sent']:
+        result['avg_queue_seconds'] = stats['queue_seconds'] / stats['sent']
+    return result
+
+
+def is_eager():
+    """Отправлять ли письмо сразу при постановке в очередь."""
+    if settings.EMAIL_OUTBOX_EAGER is not None:
+        return settings.EMAIL_OUTBOX_EAGER
+    return settings.EMAIL_BACKEND in LOCAL_BACKENDS
+
+
+def enqueue_email(subject, message, from_email, recipient_list):
+    """Ставит письмо в очередь на отправку."""
+    email = QueuedEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=','.join(recipient_list),
+    )
+    if is_eager():
+        deliver([email])
+    return email
+
+
+def claim_batch(batch_size):
+    """Забирает пачку писем, готовых к отправке.
+
+    На время отправки попытка откладывается на EMAIL_OUTBOX_LEASE
+    секунд, поэтому параллельные воркеры не берут одни и те же письма.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            pending_emails()
+            .select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size])
+        QueuedEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(next_attempt_at=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_LEASE))
+    return batch
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной попыткой."""
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def deliver(emails, connection=None):
+    """Отправляет письма через одно соединение и отмечает результат.
+
+    Если соединение с сервером не открылось, неудачной считается
+    попытка для всей пачки: письма откладываются по retry_delay, а
+    исключение не выходит наружу, чтобы не ронять воркер и запрос.
+    Возвращает количество успешно отправленных писем.
+    """
+    connection = connection or get_connection()
+    sent = []
+    failed = []
+    started = time.monotonic()
+
+    def fail(email, error):
+        email.last_error = str(error) or error.__class__.__name__
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        failed.append(email)
+
+    for email in emails:
+        email.attempts += 1
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            fail(email, e)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.recipients.split(','),
+                    connection=connection,
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    fail(email, e)
+                else:
+                    email.sent_at = timezone.now()
+                    sent.append(email)
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                # Результат писем уже известен, ошибка закрытия не важна.
+                pass
+
+    stats['batches'] += 1
+    stats['send_seconds'] += time.monotonic() - started
+    stats['sent'] += len(sent)
+    stats['failed'] += len(failed)
+    stats['queue_seconds'] += sum(
+        (email.sent_at - email.created).total_seconds() for email in sent)
+
+    QueuedEmail.objects.bulk_update(sent, ['attempts', 'sent_at'])
+    QueuedEmail.objects.bulk_update(
+        failed, ['attempts', 'last_error', 'next_attempt_at'])
+    return len(sent)
+
+
+class BatchSender:
+    """Копит письма и отправляет их пачкой через одно соединение.
+
+    Пачка уходит, когда набралось max_batch_size готовых писем или
+    самое старое из них ждет дольше max_wait секунд.
+    """
+
+    def __init__(self, max_batch_size=None, max_wait=None):
+        self.max_batch_size = (max_batch_size
+                               or settings.EMAIL_BATCH_MAX_SIZE)
+        self.max_wait = (settings.EMAIL_BATCH_MAX_WAIT
+                         if max_wait is None else max_wait)
+
+    def is_due(self):
+        ready = pending_emails().filter(next_attempt_at__lte=timezone.now())
+        oldest = ready.order_by('created').values_list(
+            'created', flat=True).first()
+        if oldest is None:
+            return False
+        waited = (timezone.now() - oldest).total_seconds()
+        return (waited >= self.max_wait
+                or ready[:self.max_batch_size].count()
+                >= self.max_batch_size)
+
+    def flush(self):
+        """Отправляет одну пачку и возвращает число отправленных писем."""
+        batch = claim_batch(self.max_batch_size)
+        return deliver(batch) if batch else 0
+
+    def drain(self):
+        """Отправляет все готовые письма, не дожидаясь накопления."""
+        total = 0
+        while True:
+            batch = claim_batch(self.max_batch_size)
+            if not batch:
+                return total
+            total += deliver(batch)
+
+    def run_once(self):
+        """Отправляет пачку, если подошло время, иначе возвращает None."""
+        if self.is_due():
+            return self.flush()
+        return None
@@ -0,0 +1,432 @@
+"""Нагрузочные замеры API v1.
+
+Создает отдельную тестовую базу, заполняет ее синтетическими данными,
+прогоняет эндпоинты /api/v1/ через тестовый клиент DRF и сохраняет
+пропускную способность, перцентили задержек и число запросов к БД в
+JSON. Результат сравнивается с сохраненным базовым замером.
+
+    python -m benchmarks.run --scale small --output bench.json
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import count
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api_yamdb'))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('SECRET', 'benchmarks')
+# Замер signup и token не должен упираться в ограничение частоты.
+for name in ('SIGNUP', 'SIGNUP_IDENTITY', 'TOKEN', 'TOKEN_IDENTITY'):
+    os.environ.setdefault(f'THROTTLE_{name}', '1000000/s')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (CaptureQueriesContext,  # noqa: E402
+                               setup_databases, setup_test_environment,
+                               teardown_databases,
+                               teardown_test_environment)
+from rest_framework.test import APIClient  # noqa: E402
+
+from api.v1.authentication import access_token_for_user  # noqa: E402
+from benchmarks.seed import SCALES, seed  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'benchmarks', 'baseline.json')
+# Метка запуска в слагах и именах: с --keepdb база остается от прошлых
+# замеров, и созданные тогда объекты не должны конфликтовать с новыми.
+RUN = int(time.time() * 1000)
+
+
+class Pool:
+    """Объекты, которые расходуются по одному на запрос (удаление).
+
+    Создаются в fill() до замера, чтобы их запросы к БД не попали в
+    счетчики эндпоинта.
+    """
+
+    def __init__(self, create):
+        self.create = create
+        self.ids = []
+
+    def fill(self, size):
+        self.ids = [self.create(i) for i in range(size)]
+
+    def __getitem__(self, i):
+        return self.ids[i]
+
+
+def disposable_title(i):
+    from reviews.models import Category, Title
+
+    return Title.objects.create(
+        name=f'На удаление {i}', year=2000,
+        category=Category.objects.order_by('pk').first()).pk
+
+
+def disposable_category(i):
+    from reviews.models import Category
+
+    return Category.objects.create(
+        name=f'На удаление {RUN}-{i}', slug=f'delete-{RUN}-{i}').slug
+
+
+def disposable_genre(i):
+    from reviews.models import Genre
+
+    return Genre.objects.create(
+        name=f'На удаление {RUN}-{i}', slug=f'delete-{RUN}-{i}').slug
+
+
+def disposable_user(i):
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.create(
+        username=f'delete{RUN}_{i}',
+        email=f'delete{RUN}_{i}@yamdb.fake').username
+
+
+def endpoints(admin):
+    """Эндпоинты: имя -> (клиент, метод, адрес(i), данные(i)[, пул]).
+
+    Покрыты все маршруты /api/v1/. Удаления, правка комментария и новый
+    отзыв берут объекты из пула, созданного до замера. Слаги и имена
+    новых объектов содержат RUN, поэтому повторный замер на базе с
+    --keepdb не упирается в уникальность.
+    """
+    from django.contrib.auth.tokens import default_token_generator
+    from reviews.models import Comment, Review
+
+    reviews = '/api/v1/titles/1/reviews/'
+    comments = f'{reviews}1/comments/'
+    user = f'/api/v1/users/{admin.username}/'
+    code = default_token_generator.make_token(admin)
+    titles = Pool(disposable_title)
+    review_titles = Pool(disposable_title)
+    categories = Pool(disposable_category)
+    genres = Pool(disposable_genre)
+    users = Pool(disposable_user)
+
+    def disposable_review(i):
+        title_id = disposable_title(i)
+        return title_id, Review.objects.create(
+            title_id=title_id, author=admin, text='На удаление', score=5).pk
+
+    title_reviews = Pool(disposable_review)
+
+    def disposable_comment(i):
+        return Comment.objects.create(
+            review_id=1, author=admin, text='Создано в замере').pk
+
+    edited_comments = Pool(disposable_comment)
+    review_comments = Pool(disposable_comment)
+    return {
+        'api_root': ('admin', 'get', lambda i: '/api/v1/', None),
+        'titles_list': ('anon', 'get', lambda i: '/api/v1/titles/', None),
+        'titles_filter': (
+            'anon', 'get',
+            lambda i: '/api/v1/titles/?category=category-1&genre=genre-1',
+            None),
+        'titles_search': (
+            'anon', 'get', lambda i: '/api/v1/titles/?search=Произведение',
+            None),
+        'titles_top_rated': (
+            'anon', 'get',
+            lambda i: '/api/v1/titles/?category=category-1&ordering=-rating',
+            None),
+        'titles_deep_page': (
+            'anon', 'get', lambda i: '/api/v1/titles/?limit=10&offset=500',
+            None),
+        'title_detail': ('anon', 'get', lambda i: '/api/v1/titles/1/', None),
+        'title_stats': (
+            'anon', 'get', lambda i: '/api/v1/titles/1/stats/', None),
+        'reviews_list': ('anon', 'get', lambda i: reviews, None),
+        'reviews_cursor': (
+            'anon', 'get', lambda i: f'{reviews}?cursor=', None),
+        'review_detail': ('anon', 'get', lambda i: f'{reviews}1/', None),
+        'comments_list': ('anon', 'get', lambda i: comments, None),
+        'categories_list': (
+            'anon', 'get', lambda i: '/api/v1/categories/', None),
+        'genres_list': ('anon', 'get', lambda i: '/api/v1/genres/', None),
+        'export_titles': (
+            'admin', 'get', lambda i: '/api/v1/export/titles/', None),
+        'export_reviews_csv': (
+            'admin', 'get', lambda i: '/api/v1/export/reviews/?format=csv',
+            None),
+        'export_comments': (
+            'admin', 'get', lambda i: '/api/v1/export/comments/', None),
+        'users_list': ('admin', 'get', lambda i: '/api/v1/users/', None),
+        'users_me': ('admin', 'get', lambda i: '/api/v1/users/me/', None),
+        'user_detail': ('admin', 'get', lambda i: user, None),
+        'changes_feed': (
+            'admin', 'get', lambda i: '/api/v1/changes/?since=0&limit=500',
+            None),
+        'perf_stats': ('admin', 'get', lambda i: '/api/v1/perf/', None),
+        'signup': (
+            'anon', 'post', lambda i: '/api/v1/auth/signup/',
+            lambda i: {'username': f'bench{RUN}_{i}',
+                       'email': f'bench{RUN}_{i}@yamdb.fake'}),
+        'token': (
+            'anon', 'post', lambda i: '/api/v1/auth/token/',
+            lambda i: {'username': admin.username,
+                       'confirmation_code': code}),
+        'user_update': (
+            'admin', 'patch', lambda i: user,
+            lambda i: {'bio': f'Замер {i}'}),
+        'user_create': (
+            'admin', 'post', lambda i: '/api/v1/users/',
+            lambda i: {'username': f'user{RUN}_{i}',
+                       'email': f'user{RUN}_{i}@yamdb.fake'}),
+        'category_create': (
+            'admin', 'post', lambda i: '/api/v1/categories/',
+            lambda i: {'name': f'Замер {RUN}-{i}',
+                       'slug': f'bench-{RUN}-{i}'}),
+        'genre_create': (
+            'admin', 'post', lambda i: '/api/v1/genres/',
+            lambda i: {'name': f'Замер {RUN}-{i}',
+                       'slug': f'bench-{RUN}-{i}'}),
+        'title_create': (
+            'admin', 'post', lambda i: '/api/v1/titles/',
+            lambda i: {'name': f'Замер {i}', 'year': 2000,
+                       'genre': ['genre-1'], 'category': 'category-1',
+                       'description': 'Создано в замере'}),
+        'title_update': (
+            'admin', 'patch', lambda i: '/api/v1/titles/1/',
+            lambda i: {'name': f'Произведение 1 ({i})'}),
+        'review_create': (
+            'admin', 'post',
+            lambda i: f'/api/v1/titles/{review_titles[i]}/reviews/',
+            lambda i: {'text': 'Замер', 'score': i % 10 + 1}, review_titles),
+        'comment_create': (
+            'admin', 'post', lambda i: comments,
+            lambda i: {'text': f'Замер {i}'}),
+        'review_update': (
+            'admin', 'patch', lambda i: f'{reviews}1/',
+            lambda i: {'text': f'Замер {i}'}),
+        'comment_update': (
+            'admin', 'patch', lambda i: f'{comments}{edited_comments[i]}/',
+            lambda i: {'text': f'Замер {i}'}, edited_comments),
+        'categories_bulk': (
+            'admin', 'post', lambda i: '/api/v1/categories/bulk/',
+            lambda i: [{'name': f'Пачка {RUN}-{i}-{n}',
+                        'slug': f'bulk-{RUN}-{i}-{n}'}
+                       for n in range(10)]),
+        'genres_bulk_update': (
+            'admin', 'patch', lambda i: '/api/v1/genres/bulk/',
+            lambda i: [{'slug': f'genre-{n}', 'name': f'Жанр {n} ({i})'}
+                       for n in range(1, 6)]),
+        'titles_bulk': (
+            'admin', 'post', lambda i: '/api/v1/titles/bulk/',
+            lambda i: [{'name': f'Пачка {i}-{n}', 'year': 2000,
+                        'genre': ['genre-1'], 'category': 'category-1',
+                        'description': 'Создано в замере'}
+                       for n in range(10)]),
+        'title_delete': (
+            'admin', 'delete', lambda i: f'/api/v1/titles/{titles[i]}/',
+            None, titles),
+        'review_delete': (
+            'admin', 'delete',
+            lambda i: '/api/v1/titles/{}/reviews/{}/'.format(
+                *title_reviews[i]),
+            None, title_reviews),
+        'comment_delete': (
+            'admin', 'delete',
+            lambda i: f'{comments}{review_comments[i]}/',
+            None, review_comments),
+        'category_delete': (
+            'admin', 'delete',
+            lambda i: f'/api/v1/categories/{categories[i]}/',
+            None, categories),
+        'genre_delete': (
+            'admin', 'delete', lambda i: f'/api/v1/genres/{genres[i]}/',
+            None, genres),
+        'user_delete': (
+            'admin', 'delete', lambda i: f'/api/v1/users/{users[i]}/',
+            None, users),
+    }
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(share * (len(values) - 1))))]
+
+
+def measure(client, method, url, data, requests, warmup):
+    """Выполняет запросы и считает задержки и число запросов к БД."""
+    numbers = count()
+
+    def call():
+        i = next(numbers)
+        payload = data(i) if data else None
+        # Списки (bulk) уходят в JSON, остальное - как у обычных форм.
+        fmt = 'json' if isinstance(payload, list) else None
+        response = getattr(client, method)(url(i), data=payload, format=fmt)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{method.upper()} {url(i)}: {response.status_code} '
+                f'{response.content[:200]!r}')
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+
+    for _ in range(warmup):
+        call()
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            request_started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - request_started) * 1000)
+        queries.append(len(context.captured_queries))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'throughput_rps': requests / elapsed,
+        'mean_ms': sum(latencies) / requests,
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'queries': max(queries),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Находит эндпоинты, которые стали медленнее или тяжелее базы."""
+    regressions = []
+    for name, current in results['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(name)
+        if base is None:
+            continue
+        if (current['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+                and current['p95_ms'] - base['p95_ms'] > min_delta_ms):
+            regressions.append({
+                'endpoint': name, 'metric': 'p95_ms',
+                'baseline': base['p95_ms'], 'current': current['p95_ms']})
+        if current['queries'] > base['queries']:
+            regressions.append({
+                'endpoint': name, 'metric': 'queries',
+                'baseline': base['queries'], 'current': current['queries']})
+    return regressions
+
+
+def prepare_data(counts, seed_value):
+    from django.contrib.auth import get_user_model
+    from reviews.models import Title
+
+    if not Title.objects.exists():
+        seed(counts, seed_value)
+    User = get_user_model()
+    admin, _ = User.objects.get_or_create(
+        username='bench_admin',
+        defaults={'email': 'bench_admin@yamdb.fake', 'role': User.ADMIN})
+    return admin
+
+
+def run(options):
+    counts = dict(SCALES[options.scale])
+    for name in counts:
+        value = getattr(options, name)
+        if value is not None:
+            counts[name] = value
+
+    admin = prepare_data(counts, options.seed)
+    admin_client = APIClient()
+    admin_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for_user(admin)}')
+    clients = {'anon': APIClient(), 'admin': admin_client}
+
+    results = {
+        'meta': {
+            'scale': options.scale,
+            'counts': counts,
+            'seed': options.seed,
+            'requests': options.requests,
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'endpoints': {},
+    }
+    for name, (client, method, url, data, *pools) in endpoints(
+            admin).items():
+        if options.only and not any(part in name for part in options.only):
+            continue
+        for pool in pools:
+            pool.fill(options.requests + options.warmup)
+        results['endpoints'][name] = measure(
+            clients[client], method, url, data,
+            options.requests, options.warmup)
+        stats = results['endpoints'][name]
+        print(f'{name:20} {stats["throughput_rps"]:8.1f} rps  '
+              f'p50 {stats["p50_ms"]:7.2f} ms  p95 {stats["p95_ms"]:7.2f} ms  '
+              f'p99 {stats["p99_ms"]:7.2f} ms  queries {stats["queries"]}',
+              file=sys.stderr)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Замеры API v1.')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int, default=None,
+                            help=f'Переопределить количество: {name}.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Запросов на эндпоинт.')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', nargs='*',
+                        help='Замерять только эндпоинты с этими словами.')
+    parser.add_argument('--output', help='Файл для результата в JSON.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Базовый замер для сравнения.')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Сохранить результат как базовый замер.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Допустимый рост p95 относительно базы.')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='Игнорировать рост p95 меньше этого значения.')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='Не удалять базу с данными после замера.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    setup_test_environment()
+    old_config = setup_databases(
+        verbosity=0, interactive=False, keepdb=options.keepdb)
+    try:
+        results = run(options)
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=options.keepdb)
+        teardown_test_environment()
+
+    if os.path.exists(options.baseline) and not options.save_baseline:
+        with open(options.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        results['regressions'] = compare(
+            results, baseline, options.tolerance, options.min_delta_ms)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
+    if options.save_baseline:
+        with open(options.baseline, 'w', encoding='utf-8') as file:
+            file.write(output)
+    return 1 if results.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
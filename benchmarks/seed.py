@@ -0,0 +1,28 @@
+"""Объемы синтетических данных для замеров.
+
+Сами данные создает команда generate_fake_data: популярность
+произведений распределена по Ципфу, у комментариев длинный хвост, а
+одно и то же зерно дает одну и ту же базу.
+"""
+
+SCALES = {
+    'small': {
+        'categories': 5, 'genres': 20, 'titles': 1000, 'users': 500,
+        'reviews': 20000, 'comments': 20000,
+    },
+    'medium': {
+        'categories': 10, 'genres': 50, 'titles': 10000, 'users': 5000,
+        'reviews': 500000, 'comments': 500000,
+    },
+    'large': {
+        'categories': 20, 'genres': 100, 'titles': 100000, 'users': 50000,
+        'reviews': 5000000, 'comments': 5000000,
+    },
+}
+
+
+def seed(counts, seed_value=0):
+    """Заполняет базу данными в объемах counts."""
+    from reviews.management.commands.generate_fake_data import generate
+
+    return generate(counts, seed_value)
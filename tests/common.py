@@ -113,3 +113,20 @@ def create_comments(admin_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def assert_fixed_query_count(client, url, expected, limits=(1, 2, 3)):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for limit in limits:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data={'limit': limit} if limit else None)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        )
+        assert len(context.captured_queries) == expected, (
+            f'Проверьте, что GET запрос `{url}` с limit={limit} выполняет '
+            f'{expected} запросов к БД, а не {len(context.captured_queries)}: '
+            + '; '.join(query['sql'] for query in context.captured_queries)
+        )
@@ -1,5 +1,7 @@
 import os
+import shutil
 import sys
+import tempfile
 
 from django.utils.version import get_version
 
@@ -31,6 +33,26 @@ if FILENAME not in project_dir_content:
 
 assert get_version() < '3.0.0', 'Пожалуйста, используйте версию Django < 3.0.0'
 
+
+TEST_CACHE_DIR = tempfile.mkdtemp(prefix='yamdb_test_cache_')
+
+
+def pytest_configure(config):
+    # Файловые кэши тестов лежат отдельно от кэшей dev-сервера на той же
+    # машине: фикстуры их очищают.
+    from django.conf import settings
+
+    for alias in ('shared', 'revocations'):
+        if settings.CACHES[alias]['BACKEND'].endswith('FileBasedCache'):
+            settings.CACHES[alias]['LOCATION'] = os.path.join(
+                TEST_CACHE_DIR, alias)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_CACHE_DIR, ignore_errors=True)
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_cache',
 ]
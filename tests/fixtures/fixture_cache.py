@@ -0,0 +1,20 @@
+import pytest
+
+
+def clear_caches():
+    from django.core.cache import cache
+
+    from api.utils.cache_utils import revocation_cache, shared_cache
+    from api.utils.user_cache import user_cache
+
+    cache.clear()
+    shared_cache().clear()
+    revocation_cache().clear()
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_caches()
+    yield
+    clear_caches()
@@ -0,0 +1,58 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{titles_id}/` возвращается статус 200'
+        )
+        return response.json().get('rating')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        assert self.get_rating(admin_client, title_id) == 4, (
+            'Проверьте, что рейтинг произведения равен средней оценке отзывов'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None, (
+            'Проверьте, что рейтинг произведения без отзывов равен `None`'
+        )
+
+        client_user = auth_client(user)
+        response = client_user.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/', data={'score': 9})
+        assert response.status_code == 200
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки отзыва'
+        )
+
+        response = admin_client.delete(f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/')
+        assert response.status_code == 204
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва'
+        )
+        for review in reviews[1:]:
+            admin_client.delete(f'/api/v1/titles/{title_id}/reviews/{review["id"]}/')
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Проверьте, что после удаления всех отзывов рейтинг равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        call_command('recalculate_ratings', stdout=StringIO())
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (12, 3, 4.0), (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает рейтинги по отзывам'
+        )
@@ -0,0 +1,30 @@
+import pytest
+
+from .common import assert_fixed_query_count, create_comments
+
+
+class Test09QueryCount:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_query_count(self, client, admin_client, admin):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        assert_fixed_query_count(client, '/api/v1/titles/', 3)
+        assert_fixed_query_count(client, f'/api/v1/titles/{titles[0]["id"]}/', 2, limits=(None,))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_comments_query_count(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        assert_fixed_query_count(client, f'/api/v1/titles/{title_id}/reviews/', 3)
+        assert_fixed_query_count(
+            client, f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 3)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_nested_parent_hierarchy(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        response = client.get(url)
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии отзыва, не принадлежащего произведению, недоступны'
+        )
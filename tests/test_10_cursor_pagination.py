@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test10CursorPagination:
+
+    def read_all_pages(self, client, url):
+        ids = []
+        response = client.get(url, data={'cursor': '', 'limit': 1})
+        while True:
+            assert response.status_code == 200, (
+                f'Проверьте, что при GET запросе `{url}` с параметром `cursor` возвращается статус 200'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не возвращает параметр `count`'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            if data['next'] is None:
+                return ids
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(data['next'])
+            assert not any('COUNT(' in query['sql'] for query in context.captured_queries), (
+                'Проверьте, что курсорная пагинация не выполняет запрос `COUNT`'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cursor_pages(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.read_all_pages(client, url) == [review['id'] for review in reversed(reviews)], (
+            f'Проверьте, что курсорная пагинация `{url}` возвращает все отзывы от новых к старым'
+        )
+        url = f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/comments/'
+        assert self.read_all_pages(client, url) == [comment['id'] for comment in reversed(comments)], (
+            f'Проверьте, что курсорная пагинация `{url}` возвращает все комментарии от новых к старым'
+        )
+
+        response = client.get(f'/api/v1/titles/{title_id}/reviews/', data={'limit': 1, 'offset': 1})
+        data = response.json()
+        assert data['count'] == 3 and len(data['results']) == 1, (
+            'Проверьте, что пагинация limit/offset продолжает работать без параметра `cursor`'
+        )
+
+        response = client.get(f'/api/v1/titles/{title_id}/reviews/', data={'cursor': 'broken'})
+        assert response.status_code == 404, (
+            'Проверьте, что при неверном курсоре возвращается статус 404'
+        )
@@ -0,0 +1,57 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import create_titles
+
+
+class Test11TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', data={'search': query})
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?search=` возвращается статус 200'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'драма') == ['Проект'], (
+            'Проверьте, что поиск находит произведение по описанию без учета регистра'
+        )
+        assert self.search(client, 'Поворот') == ['Поворот туда'], (
+            'Проверьте, что поиск находит произведение по названию'
+        )
+        assert self.search(client, 'Пов') == ['Поворот туда'], (
+            'Проверьте, что поиск находит произведение по началу слова'
+        )
+        assert self.search(client, '"') == [], (
+            'Проверьте, что поиск не падает на спецсимволах'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Разворот'})
+        assert self.search(client, 'Поворот') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        )
+        assert self.search(client, 'Разворот') == ['Разворот'], (
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.search(client, 'драма') == [], (
+            'Проверьте, что удаленное произведение пропадает из поиска'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_search_index(self, client, admin_client):
+        from django.db import connection
+        from reviews.search import FTS_TABLE
+
+        create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert self.search(client, 'Проект') == ['Проект'], (
+            'Проверьте, что команда `rebuild_search_index` восстанавливает индекс'
+        )
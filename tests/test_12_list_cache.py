@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+
+class Test12ListCache:
+
+    def check_cached_list(self, client, admin_client, url, create_data):
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert etag, f'Проверьте, что GET запрос `{url}` возвращает заголовок `ETag`'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200 and not context.captured_queries, (
+            f'Проверьте, что повторный GET запрос `{url}` отдается из кэша без запросов к БД'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and not context.captured_queries, (
+            f'Проверьте, что GET запрос `{url}` с актуальным `If-None-Match` возвращает статус 304'
+        )
+
+        count = client.get(url).json()['count']
+        admin_client.post(url, data=create_data)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            f'Проверьте, что после создания объекта кэш `{url}` сбрасывается'
+        )
+        response_count = response.json()['count']
+        assert response_count == count + 1, (
+            f'Проверьте, что после создания объекта `{url}` возвращает новый список'
+        )
+
+        slug = create_data['slug']
+        admin_client.delete(f'{url}{slug}/')
+        assert client.get(url).json()['count'] == count, (
+            f'Проверьте, что после удаления объекта кэш `{url}` сбрасывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_categories_cache(self, client, admin_client):
+        create_categories(admin_client)
+        self.check_cached_list(
+            client, admin_client, '/api/v1/categories/', {'name': 'Музыка', 'slug': 'music'})
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genres_cache(self, client, admin_client):
+        create_genre(admin_client)
+        self.check_cached_list(
+            client, admin_client, '/api/v1/genres/', {'name': 'Рок', 'slug': 'rock'})
@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_comments
+
+
+class Test13ConditionalGet:
+
+    def assert_not_modified(self, client, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, **headers)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET запрос `{url}` с актуальными валидаторами возвращает статус 304'
+        )
+        assert not context.captured_queries, (
+            f'Проверьте, что ответ 304 для `{url}` отдается без запросов к БД'
+        )
+
+    def assert_modified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            f'Проверьте, что после изменения данных `{url}` возвращает новый `ETag`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_validators(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        urls = [
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/comments/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/comments/{comments[0]["id"]}/',
+        ]
+        etags = {}
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.has_header('ETag') and response.has_header('Last-Modified'), (
+                f'Проверьте, что GET запрос `{url}` возвращает заголовки `ETag` и `Last-Modified`'
+            )
+            etags[url] = response['ETag']
+            self.assert_not_modified(client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assert_not_modified(client, url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/', data={'score': 10})
+        for url in urls[:3]:
+            self.assert_modified(client, url, etags[url])
+        self.assert_not_modified(client, urls[3], HTTP_IF_NONE_MATCH=etags[urls[3]])
+
+        admin_client.post(urls[4], data={'text': 'новый'})
+        self.assert_modified(client, urls[4], etags[urls[4]])
+        self.assert_not_modified(client, urls[5], HTTP_IF_NONE_MATCH=etags[urls[5]])
+
+        response = client.get(urls[1])
+        admin_client.patch(urls[1], data={'genre': ['drama']})
+        self.assert_modified(client, urls[1], response['ETag'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_versions_shared_and_bumped_on_commit(self, client, admin_client, admin):
+        from django.core.cache import cache
+        from django.db import transaction
+
+        from api.utils.cache_utils import get_versions
+        from reviews.models import Review
+
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        scope = f'reviews:{titles[0]["id"]}'
+        version = get_versions(scope)[scope]
+        with transaction.atomic():
+            review = Review.objects.get(pk=reviews[0]['id'])
+            review.text = 'Исправлено'
+            review.save()
+            assert get_versions(scope)[scope] == version, (
+                'Проверьте, что версия меняется только после коммита транзакции'
+            )
+        assert get_versions(scope)[scope] != version
+        self.assert_modified(client, url, etag)
+
+        etag = client.get(url)['ETag']
+        cache.clear()
+        assert client.get(url)['ETag'] == etag, (
+            'Проверьте, что версии хранятся в общем кэше, а не в памяти процесса'
+        )
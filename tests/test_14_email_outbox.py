@@ -0,0 +1,135 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class UnreachableBackend(BaseEmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError('Сервер не отвечает')
+
+    def send_messages(self, email_messages):
+        self.open()
+
+
+class Test14EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_email(self, client, settings):
+        from users.models import QueuedEmail
+
+        settings.EMAIL_OUTBOX_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.url_signup, data={'username': 'queued', 'email': 'queued@yamdb.fake'})
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при отключенном EMAIL_OUTBOX_EAGER письмо не отправляется в запросе'
+        )
+        assert QueuedEmail.objects.filter(recipients='queued@yamdb.fake', sent_at__isnull=True).exists(), (
+            'Проверьте, что письмо с кодом подтверждения попадает в очередь'
+        )
+
+        call_command('send_queued_emails', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_queued_emails` отправляет письма из очереди'
+        )
+        assert not QueuedEmail.objects.filter(sent_at__isnull=True).exists(), (
+            'Проверьте, что отправленные письма отмечаются в очереди'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_failed_email_is_retried_later(self, settings):
+        from users.models import QueuedEmail
+        from users.outbox import enqueue_email
+
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        enqueue_email('Тема', 'Код', 'yamdb@yamdb.fake', ['retry@yamdb.fake'])
+        call_command('send_queued_emails', stdout=StringIO())
+        email = QueuedEmail.objects.get()
+        assert email.sent_at is None and email.attempts == 1 and email.last_error, (
+            'Проверьте, что при ошибке отправки письмо остается в очереди с ошибкой'
+        )
+        assert email.next_attempt_at > email.created, (
+            'Проверьте, что повторная попытка откладывается'
+        )
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        outbox_before_count = len(mail.outbox)
+        call_command('send_queued_emails', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо не отправляется раньше времени повторной попытки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_batch_sender(self, settings):
+        from users.outbox import BatchSender, enqueue_email, get_stats, stats
+
+        settings.EMAIL_OUTBOX_EAGER = False
+        sender = BatchSender(max_batch_size=2, max_wait=3600)
+        outbox_before_count = len(mail.outbox)
+        batches_before = stats['batches']
+
+        enqueue_email('Тема', 'Код', 'yamdb@yamdb.fake', ['first@yamdb.fake'])
+        assert sender.run_once() is None, (
+            'Проверьте, что неполная пачка ждет накопления писем'
+        )
+        assert get_stats()['queue_depth'] == 1, (
+            'Проверьте, что статистика показывает глубину очереди'
+        )
+
+        enqueue_email('Тема', 'Код', 'yamdb@yamdb.fake', ['second@yamdb.fake'])
+        assert sender.run_once() == 2, (
+            'Проверьте, что полная пачка отправляется'
+        )
+        assert len(mail.outbox) == outbox_before_count + 2
+        assert stats['batches'] == batches_before + 1, (
+            'Проверьте, что пачка отправляется через одно соединение'
+        )
+        assert get_stats()['queue_depth'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_unreachable_server(self, client, settings):
+        from users.models import QueuedEmail
+
+        settings.EMAIL_OUTBOX_EAGER = True
+        settings.EMAIL_BACKEND = f'{__name__}.UnreachableBackend'
+        response = client.post(self.url_signup, data={'username': 'down', 'email': 'down@yamdb.fake'})
+        assert response.status_code == 200, (
+            'Проверьте, что недоступный почтовый сервер не ломает регистрацию'
+        )
+        email = QueuedEmail.objects.get()
+        assert email.sent_at is None and email.attempts == 1 and email.last_error, (
+            'Проверьте, что ошибка соединения записывается как неудачная попытка'
+        )
+        assert email.next_attempt_at > email.created
+
+        settings.EMAIL_OUTBOX_EAGER = False
+        QueuedEmail.objects.update(next_attempt_at=email.created)
+        call_command('send_queued_emails', stdout=StringIO())
+        assert QueuedEmail.objects.get().attempts == 2, (
+            'Проверьте, что воркер переживает недоступный сервер и откладывает письма'
+        )
+
+    def test_05_eager_default(self, settings):
+        from users.outbox import is_eager
+
+        settings.EMAIL_OUTBOX_EAGER = None
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        assert not is_eager(), (
+            'Проверьте, что по умолчанию письма через SMTP отправляет только воркер'
+        )
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+        assert is_eager()
+        settings.EMAIL_OUTBOX_EAGER = False
+        assert not is_eager()
@@ -0,0 +1,64 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*INDEX)')
+
+
+def full_scans(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    return {match.group(1) for match in map(FULL_SCAN.match, details) if match}
+
+
+class Test15QueryPlans:
+    """Каждый запрос эндпоинта читает таблицы по индексам.
+
+    Полный проход разрешен только по корневой таблице нефильтрованного
+    списка, который и так читается постранично.
+    """
+
+    def endpoints(self, titles, reviews, comments):
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        return [
+            ('/api/v1/titles/', {'reviews_title'}),
+            ('/api/v1/titles/?category=films', set()),
+            ('/api/v1/titles/?genre=horror', set()),
+            ('/api/v1/titles/?category=films&year=2000', set()),
+            ('/api/v1/titles/?search=Проект', set()),
+            (f'/api/v1/titles/{title_id}/', set()),
+            (reviews_url, set()),
+            (f'{reviews_url}?cursor=', set()),
+            (f'{reviews_url}{review_id}/', set()),
+            (comments_url, set()),
+            (f'{comments_url}?cursor=', set()),
+            (f'{comments_url}{comments[0]["id"]}/', set()),
+            ('/api/v1/categories/', {'reviews_category'}),
+            ('/api/v1/genres/', {'reviews_genre'}),
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_full_table_scans(self, client, admin_client, admin):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Планы запросов проверяются на SQLite')
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        for url, allowed in self.endpoints(titles, reviews, comments):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+            )
+            for query in context.captured_queries:
+                scans = full_scans(query['sql']) - allowed
+                assert not scans, (
+                    f'Запрос эндпоинта `{url}` полностью сканирует таблицы '
+                    f'{", ".join(sorted(scans))}: {query["sql"]}'
+                )
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connections
+
+from .common import auth_client, create_titles, create_users_api
+
+THREADS = 8
+
+
+class Test16ReviewConcurrency:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_parallel_duplicate_reviews(self, admin_client):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        user, _ = create_users_api(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        def post_review(score):
+            try:
+                return auth_client(user).post(url, data={'text': 'Гонка', 'score': score}).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            statuses = list(pool.map(post_review, [score % 10 + 1 for score in range(THREADS * 3)]))
+
+        assert 500 not in statuses, (
+            'Проверьте, что параллельные POST запросы отзыва не приводят к ошибке 500'
+        )
+        assert statuses.count(201) == 1 and set(statuses) == {201, 400}, (
+            'Проверьте, что из параллельных POST запросов создается только один отзыв, '
+            f'остальные получают статус 400: {statuses}'
+        )
+        assert Review.objects.filter(author=user, title_id=titles[0]['id']).count() == 1, (
+            'Проверьте, что параллельные запросы не создают дубликаты отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_concurrent_score_updates(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        from .common import create_reviews
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        first = Review.objects.get(pk=reviews[0]['id'])
+        second = Review.objects.get(pk=reviews[0]['id'])
+        expected = title.rating_sum - first.score + 7
+        first.score = 9
+        first.save()
+        second.score = 7
+        second.save()
+        title.refresh_from_db()
+        assert title.rating_sum == expected, (
+            'Проверьте, что разница оценок считается от сохраненной в БД оценки, '
+            'а не от снимка при загрузке отзыва'
+        )
@@ -0,0 +1,47 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17Performance:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, settings, client, admin_client, user_client):
+        from api_yamdb.middleware import route_stats
+
+        settings.PERF_METRICS_ENABLED = True
+        route_stats.clear()
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        timing = response.get('Server-Timing', '')
+        for metric in ('total;dur=', 'db;desc="', 'serialize;dur='):
+            assert metric in timing, (
+                'Проверьте, что ответ содержит заголовок `Server-Timing` '
+                f'с метрикой `{metric}`: {timing}'
+            )
+
+        response = user_client.get('/api/v1/perf/')
+        assert response.status_code == 403, (
+            'Проверьте, что статистика `/api/v1/perf/` недоступна обычному пользователю'
+        )
+        response = admin_client.get('/api/v1/perf/')
+        assert response.status_code == 200, (
+            'Проверьте, что статистика `/api/v1/perf/` доступна администратору'
+        )
+        routes = response.json()['routes']
+        assert 'GET api:titles-list' in routes, (
+            'Проверьте, что статистика группируется по маршрутам'
+        )
+        stats = routes['GET api:titles-list']
+        assert stats['count'] == 1 and stats['avg_db_queries'] >= 2, (
+            'Проверьте, что статистика считает запросы к БД'
+        )
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_disabled(self, settings, client):
+        settings.PERF_METRICS_ENABLED = False
+        response = client.get('/api/v1/titles/')
+        assert not response.has_header('Server-Timing'), (
+            'Проверьте, что при выключенном замере заголовок `Server-Timing` не добавляется'
+        )
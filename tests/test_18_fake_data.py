@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+ARGS = ('--categories', '3', '--genres', '5', '--titles', '20', '--users', '10',
+        '--reviews', '100', '--comments', '150', '--seed', '7')
+
+
+def snapshot():
+    from reviews.models import Comment, GenreTitle, Review, Title
+
+    return (
+        list(Title.objects.order_by('id').values_list(
+            'year', 'category_id', 'rating_count', 'rating')),
+        list(GenreTitle.objects.order_by('title_id', 'genre_id').values_list(
+            'title_id', 'genre_id')),
+        list(Review.objects.order_by('id').values_list(
+            'title_id', 'author_id', 'score', 'pub_date')),
+        list(Comment.objects.order_by('id').values_list(
+            'review_id', 'author_id', 'pub_date')),
+    )
+
+
+class Test18GenerateFakeData:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_generate_fake_data(self):
+        from reviews.models import Category, Genre, Title
+        from users.models import User
+
+        call_command('generate_fake_data', *ARGS, stdout=StringIO())
+        titles, genre_titles, reviews, comments = snapshot()
+        assert (len(titles), len(reviews), len(comments)) == (20, 100, 150), (
+            'Проверьте, что команда `generate_fake_data` создает заданное количество строк'
+        )
+        assert {title_id for title_id, _ in genre_titles} == set(range(1, 21)), (
+            'Проверьте, что у каждого произведения есть хотя бы один жанр'
+        )
+        counts = [rating_count for _, _, rating_count, _ in titles]
+        assert counts[0] > counts[-1] and sum(counts) == 100, (
+            'Проверьте, что отзывы распределены неравномерно и учтены в рейтинге'
+        )
+
+        expected = snapshot()
+        for model in (Title, Category, Genre, User):
+            model.objects.all().delete()
+        call_command('generate_fake_data', *ARGS, stdout=StringIO())
+        assert snapshot() == expected, (
+            'Проверьте, что команда `generate_fake_data` с одним зерном создает одни и те же данные, '
+            'включая даты публикации'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_zero_counts(self):
+        from reviews.models import Review, Title
+        from users.models import User
+
+        call_command('generate_fake_data', '--categories', '2', '--genres', '2',
+                     '--titles', '0', '--users', '3', '--reviews', '0',
+                     '--comments', '0', stdout=StringIO())
+        assert User.objects.count() == 3 and not Title.objects.exists(), (
+            'Проверьте, что нулевые объемы не ломают `generate_fake_data`'
+        )
+        call_command('generate_fake_data', '--categories', '1', '--genres', '1',
+                     '--titles', '2', '--users', '0', '--reviews', '0',
+                     '--comments', '0', stdout=StringIO())
+        assert Title.objects.count() == 2 and not Review.objects.exists()
@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_reviews
+
+
+class Test19TitleStats:
+
+    def get_stats(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/stats/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/stats/` возвращается статус 200'
+        )
+        return response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stats_follow_reviews(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        stats = self.get_stats(client, title_id)
+        assert stats['count'] == 3 and stats['last_review_date'] is not None, (
+            'Проверьте, что статистика содержит количество отзывов и дату последнего отзыва'
+        )
+        assert {score: count for score, count in stats['histogram'].items() if count} == {
+            '3': 1, '4': 1, '5': 1}, (
+            'Проверьте, что гистограмма оценок соответствует отзывам'
+        )
+        assert self.get_stats(client, titles[1]['id'])['count'] == 0
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/', data={'score': 9})
+        admin_client.delete(f'/api/v1/titles/{title_id}/reviews/{reviews[2]["id"]}/')
+        stats = self.get_stats(client, title_id)
+        assert stats['count'] == 2 and stats['histogram']['3'] == 0, (
+            'Проверьте, что статистика обновляется при изменении и удалении отзыва'
+        )
+        assert {score: count for score, count in stats['histogram'].items() if count} == {
+            '5': 1, '9': 1}
+        review = client.get(f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/').json()
+        assert stats['last_review_date'] == review['pub_date'], (
+            'Проверьте, что после удаления последнего отзыва дата берется из оставшихся'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_stats(client, title_id)
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что статистика читается одним запросом к БД'
+        )
+        assert client.get('/api/v1/titles/100500/stats/').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_expand_stats(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert 'stats' not in response.json(), (
+            'Проверьте, что статистика не выводится без параметра `expand`'
+        )
+        response = client.get(f'/api/v1/titles/{title_id}/?expand=stats')
+        assert response.json()['stats']['count'] == 3, (
+            'Проверьте, что `?expand=stats` добавляет статистику в ответ'
+        )
+        response = client.get('/api/v1/titles/?expand=stats')
+        assert all('stats' in title for title in response.json()['results'])
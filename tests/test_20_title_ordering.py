@@ -0,0 +1,95 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class Test20TitleOrdering:
+
+    orderings = {
+        'rating': ('rating', False),
+        '-rating': ('rating', True),
+        'reviews_count': ('rating_count', False),
+        '-reviews_count': ('rating_count', True),
+        '-year': ('year', True),
+        'name': ('name', False),
+    }
+
+    def generate(self):
+        call_command(
+            'generate_fake_data', '--categories', '3', '--genres', '5',
+            '--titles', '200', '--users', '20', '--reviews', '1000',
+            '--comments', '0', stdout=StringIO())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ordering(self, client):
+        from reviews.models import Title
+
+        self.generate()
+        for ordering, (field, reverse) in self.orderings.items():
+            response = client.get(f'/api/v1/titles/?ordering={ordering}&limit=200')
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос `/api/v1/titles/?ordering={ordering}` возвращает статус 200'
+            )
+            ids = [title['id'] for title in response.json()['results']]
+            values = dict(Title.objects.values_list('id', field))
+            expected = sorted(
+                ids, key=lambda pk: (values[pk] is not None, values[pk] or 0, pk),
+                reverse=reverse)
+            assert ids == expected, (
+                f'Проверьте, что `?ordering={ordering}` сортирует произведения по `{field}`, '
+                'а при равенстве - по id'
+            )
+        response = client.get('/api/v1/titles/?ordering=description')
+        assert response.status_code == 400, (
+            'Проверьте, что сортировка по неизвестному полю возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ordering_uses_indexes(self, client):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Планы запросов проверяются на SQLite')
+        self.generate()
+        urls = [f'/api/v1/titles/?ordering={ordering}&limit=10'
+                for ordering in self.orderings]
+        urls += ['/api/v1/titles/?category=category-1&ordering=-rating&limit=10',
+                 '/api/v1/titles/?category=category-1&ordering=-reviews_count&limit=10']
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            for query in context.captured_queries:
+                plan = query_plan(query['sql'])
+                assert not any('TEMP B-TREE' in detail for detail in plan), (
+                    f'Проверьте, что GET запрос `{url}` читает первые строки индекса без сортировки: '
+                    f'{plan}'
+                )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unrated_last_on_postgresql(self, monkeypatch):
+        from api.v1.filters import TtileFilter
+        from reviews.models import Title
+
+        self.generate()
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        for ordering in ('-rating', 'rating'):
+            queryset = TtileFilter(
+                {'ordering': ordering}, queryset=Title.objects.all()).qs
+            nulls = 'NULLS LAST' if ordering.startswith('-') else 'NULLS FIRST'
+            assert nulls in str(queryset.query), (
+                f'Проверьте, что на PostgreSQL `?ordering={ordering}` явно задает {nulls}'
+            )
+            ratings = list(queryset.values_list('rating', flat=True))
+            expected = sorted(ratings, key=lambda rating: (rating is not None, rating or 0),
+                              reverse=ordering.startswith('-'))
+            assert ratings == expected, (
+                'Проверьте, что произведения без рейтинга идут после оцененных '
+                'при сортировке по убыванию'
+            )
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+class Test21BulkWrite:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_permissions(self, client, user_client):
+        data = json.dumps([{'name': 'Жанр', 'slug': 'genre'}])
+        for url in ('/api/v1/titles/bulk/', '/api/v1/genres/bulk/', '/api/v1/categories/bulk/'):
+            response = client.post(url, data=data, content_type='application/json')
+            assert response.status_code == 401, (
+                f'Проверьте, что POST запрос `{url}` без токена возвращает статус 401'
+            )
+            response = user_client.post(url, data=data, content_type='application/json')
+            assert response.status_code == 403, (
+                f'Проверьте, что POST запрос `{url}` обычного пользователя возвращает статус 403'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_create_titles(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = [
+            {'name': f'Произведение {i}', 'year': 1990 + i, 'description': 'Описание',
+             'genre': [genres[0]['slug'], genres[1]['slug']], 'category': categories[0]['slug']}
+            for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/bulk/', data=data, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` администратора возвращает статус 201'
+        )
+        assert len(context.captured_queries) < 20, (
+            'Проверьте, что массовое создание не выполняет запросы на каждый элемент'
+        )
+        results = response.json()['results']
+        assert [item['index'] for item in results] == list(range(20))
+        title = admin_client.get(f'/api/v1/titles/{results[5]["id"]}/').json()
+        assert title['name'] == 'Произведение 5' and len(title['genre']) == 2, (
+            'Проверьте, что массовое создание сохраняет произведения вместе с жанрами'
+        )
+        response = admin_client.get('/api/v1/titles/?search=Произведение')
+        assert response.json()['count'] == 20, (
+            'Проверьте, что созданные произведения попадают в поисковый индекс'
+        )
+        response = admin_client.get(f'/api/v1/titles/{results[5]["id"]}/stats/')
+        assert response.status_code == 200 and response.json()['count'] == 0
+
+        response = admin_client.patch('/api/v1/titles/bulk/', data=[
+            {'id': results[0]['id'], 'name': 'Новое имя', 'genre': [genres[2]['slug']]},
+            {'id': 100500, 'name': 'Нет такого'},
+        ], format='json')
+        assert response.status_code == 200
+        assert [error['index'] for error in response.json()['errors']] == [1], (
+            'Проверьте, что ошибки возвращаются по индексам элементов'
+        )
+        title = admin_client.get(f'/api/v1/titles/{results[0]["id"]}/').json()
+        assert title['name'] == 'Новое имя' and [g['slug'] for g in title['genre']] == [genres[2]['slug']], (
+            'Проверьте, что PATCH запрос `/api/v1/titles/bulk/` обновляет произведения и жанры'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_errors_and_atomic(self, admin_client):
+        from reviews.models import Genre
+
+        data = [
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Без слага'},
+            {'name': 'Повтор', 'slug': 'horror'},
+        ]
+        response = admin_client.post('/api/v1/genres/bulk/?atomic=true', data=data, format='json')
+        assert response.status_code == 400 and not Genre.objects.exists(), (
+            'Проверьте, что с `?atomic=true` при ошибке ничего не записывается'
+        )
+        assert [error['index'] for error in response.json()['errors']] == [1, 2]
+
+        response = admin_client.post('/api/v1/genres/bulk/', data=data, format='json')
+        assert response.status_code == 201
+        assert response.json()['results'] == [{'index': 0, 'slug': 'horror'}], (
+            'Проверьте, что без `atomic` записываются корректные элементы'
+        )
+        response = admin_client.post('/api/v1/genres/bulk/', data=data[:1], format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что существующий слаг возвращает ошибку'
+        )
+        response = admin_client.post('/api/v1/categories/bulk/', data={'name': 'x'}, format='json')
+        assert response.status_code == 400
+        response = admin_client.get('/api/v1/genres/')
+        assert response.json()['count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reserved_slug(self, admin_client):
+        for url in ('/api/v1/categories/', '/api/v1/genres/'):
+            response = admin_client.post(url, data={'name': f'Пачка {url}', 'slug': 'bulk'})
+            assert response.status_code == 400 and 'slug' in response.json(), (
+                f'Проверьте, что POST запрос `{url}` не создает объект со слагом `bulk`, '
+                'который нельзя было бы удалить'
+            )
+            response = admin_client.post(
+                f'{url}bulk/', data=[{'name': f'Пачка {url}', 'slug': 'Bulk'}], format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что массовая запись `{url}bulk/` не принимает слаг `bulk`'
+            )
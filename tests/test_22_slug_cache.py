@@ -0,0 +1,60 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+SLUG_LOOKUP = re.compile(r'"reviews_(?:category|genre)"\."slug" (?:=|IN)')
+
+
+def slug_lookups(context):
+    return [query['sql'] for query in context.captured_queries
+            if SLUG_LOOKUP.search(query['sql'])]
+
+
+class Test22SlugCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_write_uses_slug_cache(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = {'name': 'Новое', 'year': 2001, 'description': 'Описание',
+                'genre': [genres[0]['slug'], genres[2]['slug']], 'category': categories[1]['slug']}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert response.json()['category'] == categories[1]['slug']
+        assert slug_lookups(context) == [], (
+            'Проверьте, что слаги жанров и категорий при записи произведения берутся из кэша'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(
+                f'/api/v1/titles/?category={categories[1]["slug"]}&genre={genres[0]["slug"]}')
+        assert response.json()['count'] == 1
+        assert slug_lookups(context) == [], (
+            'Проверьте, что фильтр произведений использует id вместо соединения по слагу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_slug_cache_invalidation(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        slug = categories[0]['slug']
+        assert admin_client.get(f'/api/v1/titles/?category={slug}').json()['count'] == 1
+        admin_client.delete(f'/api/v1/categories/{slug}/')
+        assert admin_client.get(f'/api/v1/titles/?category={slug}').json()['count'] == 0, (
+            'Проверьте, что удаление категории сбрасывает кэш слагов'
+        )
+        data = {'name': 'Новое', 'year': 2001, 'description': 'Описание',
+                'genre': [genres[0]['slug']], 'category': slug}
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что произведение с удаленной категорией не создается'
+        )
+        admin_client.post('/api/v1/categories/', data={'name': 'Снова', 'slug': slug})
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201, (
+            'Проверьте, что новая категория с тем же слагом доступна сразу'
+        )
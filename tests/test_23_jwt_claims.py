@@ -0,0 +1,106 @@
+import re
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+USER_LOOKUP = re.compile(r'FROM "users_user" WHERE "users_user"\."id" =')
+
+
+def user_lookups(context):
+    return [query['sql'] for query in context.captured_queries
+            if USER_LOOKUP.search(query['sql'])]
+
+
+def claims_client(user):
+    code = default_token_generator.make_token(user)
+    response = APIClient().post(
+        '/api/v1/auth/token/',
+        data={'username': user.username, 'confirmation_code': code})
+    assert response.status_code == 200
+    token = response.json()['token']
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client, AccessToken(token)
+
+
+class Test23JWTClaims:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_claims(self, admin):
+        client, token = claims_client(admin)
+        assert token['role'] == 'admin' and token['is_superuser'] is False, (
+            'Проверьте, что токен содержит роль пользователя и признак суперюзера'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/users/')
+        assert response.status_code == 200
+        assert user_lookups(context) == [], (
+            'Проверьте, что запрос с токеном не загружает пользователя из БД'
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['username'] == admin.username, (
+            'Проверьте, что эндпоинт `me` возвращает данные пользователя из БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes_claims(self, admin, user):
+        client, _ = claims_client(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        user.role = 'admin'
+        user.save()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Проверьте, что после смены роли права берутся из БД, а не из старого токена'
+        )
+        assert user_lookups(context), (
+            'Проверьте, что отозванные claims приводят к загрузке пользователя из БД'
+        )
+
+        client, _ = claims_client(admin)
+        admin.is_active = False
+        admin.save()
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что токен деактивированного пользователя не принимается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_token_without_claims(self, admin_client, user_client):
+        assert admin_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что токены без claims по-прежнему принимаются'
+        )
+        assert user_client.get('/api/v1/users/').status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_revocation_shared_between_workers(self, admin, settings):
+        from django.core.cache import cache
+        from django.core.exceptions import ImproperlyConfigured
+
+        from api.utils.cache_utils import check_shared_cache, shared_cache
+        from api.utils.user_cache import user_cache
+
+        client, _ = claims_client(admin)
+        admin.role = 'user'
+        admin.save()
+        cache.clear()
+        user_cache.clear()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что отзыв claims виден процессам с другим локальным кэшем'
+        )
+        shared_cache().clear()
+        user_cache.clear()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что отзыв claims не теряется при вытеснении версий из кэша shared'
+        )
+
+        caches = settings.CACHES
+        for alias in ('shared', 'revocations'):
+            settings.CACHES = dict(caches, **{alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+            with pytest.raises(ImproperlyConfigured):
+                check_shared_cache()
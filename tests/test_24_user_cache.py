@@ -0,0 +1,53 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+USER_LOOKUP = re.compile(r'FROM "users_user" WHERE "users_user"\."id" =')
+
+
+def user_lookups(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    lookups = [query['sql'] for query in context.captured_queries
+               if USER_LOOKUP.search(query['sql'])]
+    return response, lookups
+
+
+class Test24UserCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_user_loaded_once(self, admin_client):
+        _, lookups = user_lookups(admin_client, '/api/v1/categories/')
+        assert len(lookups) == 1
+        for _ in range(3):
+            response, lookups = user_lookups(admin_client, '/api/v1/categories/')
+            assert response.status_code == 200
+            assert lookups == [], (
+                'Проверьте, что пользователь для токена берется из кэша'
+            )
+        stats = admin_client.get('/api/v1/perf/').json()['user_cache']
+        assert stats['misses'] == 1 and stats['local_hits'] >= 3, (
+            'Проверьте, что `/api/v1/perf/` показывает статистику кэша пользователей'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidation(self, admin_client, user, user_client):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сразу сбрасывает кэш пользователя'
+        )
+        response = user_client.patch('/api/v1/users/me/', data={'bio': 'Новое'})
+        assert response.json()['role'] == 'admin'
+        assert user_client.get('/api/v1/users/me/').json()['bio'] == 'Новое', (
+            'Проверьте, что изменение своих данных сбрасывает кэш пользователя'
+        )
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert user_client.get('/api/v1/categories/').status_code == 401, (
+            'Проверьте, что удаление пользователя сразу сбрасывает кэш'
+        )
@@ -0,0 +1,95 @@
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.v1.throttling import (TokenBucketThrottle, local_buckets,
+                               throttle_stats)
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    monkeypatch.setattr(TokenBucketThrottle, 'THROTTLE_RATES', {
+        'signup': '4/hour',
+        'signup_identity': '2/hour',
+        'token': '4/hour',
+        'token_identity': '2/hour',
+    })
+    throttle_stats.clear()
+    local_buckets.clear()
+    yield
+    local_buckets.clear()
+
+
+class Test25AuthThrottling:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_throttled_before_db(self, client, rates):
+        data = {'username': 'bot', 'email': 'bot@yamdb.fake'}
+        assert client.post(self.url_signup, data=data).status_code == 200
+        data['email'] = 'bot2@yamdb.fake'
+        assert client.post(self.url_signup, data=data).status_code == 400
+        sent = len(mail.outbox)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                self.url_signup, data={'username': 'BOT', 'email': 'other@yamdb.fake'})
+        assert response.status_code == 429, (
+            'Проверьте, что повторная регистрация с тем же username ограничена'
+        )
+        assert 'Retry-After' in response
+        assert context.captured_queries == [] and len(mail.outbox) == sent, (
+            'Проверьте, что отклоненный запрос не обращается к БД и почте'
+        )
+
+        response = client.post(
+            self.url_signup, data={'username': 'bot1', 'email': 'bot1@yamdb.fake'})
+        assert response.status_code == 200
+        response = client.post(
+            self.url_signup, data={'username': 'bot9', 'email': 'bot9@yamdb.fake'})
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничена по IP'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_token_throttled(self, client, user, rates, admin_client):
+        data = {'username': user.username, 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            assert client.post(self.url_token, data=data).status_code == 400
+        assert client.post(self.url_token, data=data).status_code == 429, (
+            'Проверьте, что подбор кода подтверждения ограничен по username'
+        )
+        stats = admin_client.get('/api/v1/perf/').json()['throttles']
+        assert stats['token_identity']['throttled'] == 1, (
+            'Проверьте, что `/api/v1/perf/` показывает счетчики ограничений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_local_fallback(self, client, rates, monkeypatch):
+        from api.utils.cache_utils import shared_cache
+
+        def unavailable(*args, **kwargs):
+            raise ConnectionError
+
+        monkeypatch.setattr(shared_cache(), 'get_many', unavailable)
+        monkeypatch.setattr(shared_cache(), 'set_many', unavailable)
+        data = {'username': 'nocache', 'email': 'nocache@yamdb.fake'}
+        assert client.post(self.url_signup, data=data).status_code == 200
+        assert client.post(self.url_signup, data=data).status_code == 400
+        assert client.post(self.url_signup, data=data).status_code == 429, (
+            'Проверьте, что без общего кэша ограничение работает в памяти процесса'
+        )
+        assert throttle_stats.summary()['signup']['fallback'] > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_buckets_shared_between_workers(self, client, user, rates):
+        from django.core.cache import cache
+
+        data = {'username': user.username, 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            assert client.post(self.url_token, data=data).status_code == 400
+            cache.clear()
+        assert client.post(self.url_token, data=data).status_code == 429, (
+            'Проверьте, что корзины лежат в общем кэше, а не в памяти процесса'
+        )
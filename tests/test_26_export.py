@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review
+
+from .common import create_comments, create_titles
+
+
+def read(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in read(response).splitlines()]
+
+
+class Test26Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_titles(self, admin_client, user_client):
+        assert user_client.get('/api/v1/export/titles/').status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+        titles, _, _ = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get('/api/v1/export/titles/')
+            rows = ndjson(response)
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдается через StreamingHttpResponse'
+        )
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert [row['name'] for row in rows] == [title['name'] for title in titles]
+        assert [row['genre'] for row in rows] == [title['genre'] for title in titles]
+        assert not any('COUNT(' in query['sql'] or 'LIMIT' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что выгрузка не использует пагинацию и подсчет строк'
+        )
+
+        response = admin_client.get('/api/v1/export/titles/?format=csv')
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(read(response))))
+        assert rows[0]['category'] == titles[0]['category']
+        assert rows[0]['genre'] == ','.join(titles[0]['genre'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_since(self, admin_client, admin):
+        comments, reviews, *_ = create_comments(admin_client, admin)
+        rows = ndjson(admin_client.get('/api/v1/export/reviews/'))
+        assert [row['id'] for row in rows] == [review['id'] for review in reviews]
+        assert ndjson(admin_client.get('/api/v1/export/comments/'))[0]['author'] == comments[0]['author']
+
+        since = Review.objects.get(pk=reviews[1]['id']).pub_date
+        response = admin_client.get(
+            '/api/v1/export/reviews/', {'since': since.isoformat()})
+        assert [row['id'] for row in ndjson(response)] == [review['id'] for review in reviews[1:]], (
+            'Проверьте, что `?since=` отдает строки начиная с указанной даты'
+        )
+        response = admin_client.get('/api/v1/export/reviews/?since=вчера')
+        assert response.status_code == 400
@@ -0,0 +1,97 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import ChangeLog
+
+from .common import create_comments
+
+
+def changes(client, **params):
+    response = client.get('/api/v1/changes/', params)
+    assert response.status_code == 200
+    return response.json()
+
+
+class Test27Changes:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_change_feed(self, admin_client, admin, user_client, settings):
+        settings.CHANGE_FEED_LAG = 0
+        assert user_client.get('/api/v1/changes/').status_code == 403, (
+            'Проверьте, что лента изменений доступна только администратору'
+        )
+        comments, reviews, titles, *_ = create_comments(admin_client, admin)
+        feed = changes(admin_client, model='comment')
+        assert [(row['action'], row['id']) for row in feed['results']] == [
+            ('create', comment['id']) for comment in comments
+        ], 'Проверьте, что создание комментариев попадает в ленту'
+        assert feed['results'][0]['data']['review'] == reviews[0]['id']
+
+        cursor = changes(admin_client)['next']
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        admin_client.patch(url, data={'text': 'Новый текст'})
+        admin_client.delete(f'{url}comments/{comments[0]["id"]}/')
+        feed = changes(admin_client, since=cursor, limit=1)
+        assert feed['has_more'], (
+            'Проверьте, что лента отдает не больше `limit` строк'
+        )
+        assert feed['results'][0]['action'] == 'update'
+        assert feed['results'][0]['data']['text'] == 'Новый текст'
+        feed = changes(admin_client, since=feed['next'])
+        assert not feed['has_more']
+        assert [(row['model'], row['action'], row['data']) for row in feed['results']] == [
+            ('comment', 'delete', None)
+        ], 'Проверьте, что удаление попадает в ленту без данных объекта'
+        assert changes(admin_client, since=feed['next'])['results'] == []
+
+        response = admin_client.get('/api/v1/changes/?since=abc')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_write_and_compaction(self, client, admin_client, token_admin, settings):
+        settings.CHANGE_FEED_LAG = 0
+        admin_client.post('/api/v1/categories/', data={'name': 'Книга', 'slug': 'books'})
+        admin_client.post('/api/v1/genres/', data={'name': 'Сказка', 'slug': 'tale'})
+        data = [{'name': f'Пачка {number}', 'year': 2000, 'description': 'Описание',
+                 'genre': ['tale'], 'category': 'books'} for number in range(2)]
+        response = client.post(
+            '/api/v1/titles/bulk/', data=json.dumps(data), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token_admin["access"]}')
+        assert response.status_code == 201, response.json()
+        feed = changes(admin_client, model='title')
+        assert [row['data']['name'] for row in feed['results']] == ['Пачка 0', 'Пачка 1'], (
+            'Проверьте, что массовая запись пишет изменения в журнал'
+        )
+        title_id = feed['results'][0]['id']
+        admin_client.patch(f'/api/v1/titles/{title_id}/', data={'name': 'Другое'})
+        admin_client.patch(f'/api/v1/titles/{title_id}/', data={'name': 'Третье'})
+        last = ChangeLog.objects.latest('pk')
+
+        call_command('compact_changes', days=0)
+        rows = ChangeLog.objects.filter(object_id=title_id, model='title')
+        assert list(rows.values_list('pk', 'action')) == [(last.pk, 'update')], (
+            'Проверьте, что сжатие оставляет только последнюю строку объекта'
+        )
+        ChangeLog.objects.exclude(pk=last.pk).update(
+            changed_at=timezone.now() - timedelta(days=40))
+        call_command('compact_changes', days=30)
+        assert list(ChangeLog.objects.values_list('pk', flat=True)) == [last.pk], (
+            'Проверьте, что команда удаляет строки старше срока хранения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_feed_lag(self, admin_client, admin, settings):
+        settings.CHANGE_FEED_LAG = 60
+        create_comments(admin_client, admin)
+        old = list(ChangeLog.objects.order_by('pk')[:2])
+        ChangeLog.objects.filter(pk__in=[change.pk for change in old]).update(
+            changed_at=timezone.now() - timedelta(minutes=5))
+        ChangeLog.objects.filter(pk=old[1].pk).update(changed_at=timezone.now())
+        feed = changes(admin_client)
+        assert [row['cursor'] for row in feed['results']] == [old[0].pk], (
+            'Проверьте, что лента обрывается на первой строке моложе CHANGE_FEED_LAG'
+        )
+        assert feed['next'] == old[0].pk and not feed['has_more']
@@ -0,0 +1,109 @@
+import pytest
+from django.core.management import call_command
+from reviews.management.commands.import_csv import (
+    NAME_MODELS, build_dependencies, topological_order,
+)
+from reviews.models import Review, Title
+from users.models import User
+
+
+class Test28ImportCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_upsert_keeps_missing_columns(self):
+        call_command('import_csv', 'category', 'titles', 'users')
+        Title.objects.filter(pk=1).update(description='Описание')
+        user = User.objects.get(pk=100)
+        user.set_password('secret')
+        user.is_superuser = True
+        user.save()
+
+        call_command('import_csv', 'titles', 'users', upsert=True)
+        assert Title.objects.get(pk=1).description == 'Описание', (
+            'Проверьте, что `--upsert` не затирает поля, которых нет в CSV'
+        )
+        user = User.objects.get(pk=100)
+        assert user.check_password('secret') and user.is_superuser, (
+            'Проверьте, что `--upsert` не сбрасывает пароль и права пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_truncate_dependent_tables(self):
+        call_command('import_csv')
+        titles = Title.objects.count()
+        call_command('import_csv', truncate=True)
+        assert Title.objects.count() == titles, (
+            'Проверьте, что `--truncate` очищает и зависимые таблицы, например статистику'
+        )
+        call_command('import_csv', 'titles', 'genre_title', truncate=True)
+        assert Title.objects.filter(stats__isnull=False).count() == titles
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_import_invalidates_api_caches(self, client, tmp_path):
+        from api.utils.slug_cache import category_slugs
+
+        call_command('import_csv', 'category')
+        etag = client.get('/api/v1/categories/')['ETag']
+        assert category_slugs.get('movie') == 1
+
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n1,Сериал,series\n', encoding='utf-8')
+        call_command('import_csv', 'category', truncate=True,
+                     data_dir=str(tmp_path))
+        response = client.get('/api/v1/categories/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что загрузка из CSV меняет ETag списков'
+        )
+        assert [row['slug'] for row in response.json()['results']] == ['series']
+        assert category_slugs.get('movie') is None, (
+            'Проверьте, что загрузка из CSV сбрасывает кэш слагов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_truncate_refreshes_ratings(self):
+        call_command('import_csv')
+        assert Title.objects.get(pk=1).rating_count
+        call_command('import_csv', 'users', truncate=True)
+        assert not Review.objects.exists()
+        title = Title.objects.select_related('stats').get(pk=1)
+        assert (title.rating, title.rating_count, title.stats.count) == (None, 0, 0), (
+            'Проверьте, что после очистки зависимых таблиц рейтинг и статистика пересчитаны'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_keeps_pub_date(self):
+        call_command('import_csv')
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat() == '2019-09-24T21:08:21.567000+00:00', (
+            'Проверьте, что импорт сохраняет pub_date из CSV, а не время загрузки'
+        )
+        Review.objects.filter(pk=1).update(text='Другой текст')
+        call_command('import_csv', 'review', upsert=True)
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat() == '2019-09-24T21:08:21.567000+00:00'
+        assert review.text != 'Другой текст'
+
+    def test_06_parents_before_children(self):
+        order = topological_order(build_dependencies(list(NAME_MODELS)))
+        for child, parents in build_dependencies(list(NAME_MODELS)).items():
+            for parent in parents:
+                assert order.index(parent) < order.index(child), (
+                    f'Проверьте, что {parent} загружается раньше {child}'
+                )
+        assert build_dependencies(['review', 'comments']) == {
+            'review': set(), 'comments': {'review'},
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_parallel_import(self):
+        call_command('import_csv', parallel=2)
+        counts = {name: model.objects.count()
+                  for name, model in NAME_MODELS.items()}
+        call_command('import_csv', truncate=True)
+        assert counts == {name: model.objects.count()
+                          for name, model in NAME_MODELS.items()}, (
+            'Проверьте, что `--parallel` загружает все файлы целиком'
+        )
+        assert Title.objects.get(pk=1).rating_count, (
+            'Проверьте, что после параллельного импорта пересчитан рейтинг'
+        )